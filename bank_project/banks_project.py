@@ -1,11 +1,18 @@
 # Code for ETL operations on Country-GDP data
 
 # Importing the required libraries
-import requests
-from bs4 import BeautifulSoup
+import http_cache
+import os
+import sys
+import numpy as np
 import pandas as pd
 import sqlite3
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import sqlite_pool
+from common.numeric import parse_numeric
+from common.wikitable import extract_table
+
 # Define the required entities
 
 
@@ -16,7 +23,12 @@ output_file='largest_banks_data.csv'
 database_name='banks.db'
 table_name='largest_banks'
 log_file='code_log.txt'
-csv_path='exchange_rates.csv'
+load_mode='replace' # 'replace' rebuilds the table, 'upsert' updates it in place and keeps banks no longer listed
+csv_path='exchange_rate.csv'
+# Table has 3 columns: ['Rank', 'Bank name', 'Market cap (US$ billion)']
+table_spec={'classes': ('wikitable', 'sortable'),
+            'columns': [('Bank name', table_attribs_extracted[0], 'string'),
+                        ('Market cap', table_attribs_extracted[1], 'float64')]}
 
 def log_progress(message):
     ''' This function logs the mentioned message of a given stage of the
@@ -25,64 +37,151 @@ def log_progress(message):
         f.write(message+'\n')
     print(message)
 
-def extract(url, table_attribs_extracted):
+def extract(url, table_attribs_extracted, spec=None):
     ''' This function aims to extract the required
     information from the website and save it to a data frame. The
     function returns the data frame for further processing. '''
-    response = requests.get(url).text
-    soup = BeautifulSoup(response,"html.parser")
-    
-    # Find table that contains both 'wikitable' and 'sortable' classes
-    tables = soup.find_all('table')
-    table = None
-    for t in tables:
-        classes = t.get('class', [])
-        if 'wikitable' in classes and 'sortable' in classes:
-            table = t
-            break
-    
-    if table is None:
-        raise ValueError("Could not find a table with both 'wikitable' and 'sortable' classes")
-    
-    df = pd.read_html(str(table))[0]
-    
-    # Table has 3 columns: ['Rank', 'Bank name', 'Market cap (US$ billion)']
-    # Select only Bank name (column 1) and Market cap (column 2)
-    if len(df.columns) >= 3:
-        df = df.iloc[:, [1, 2]]  # Select columns 1 and 2 (Bank name, Market cap)
-        df.columns = table_attribs_extracted
+    response = http_cache.get_text(url)
+    # Only the Bank name and Market cap columns are parsed, as typed columns
+    df = extract_table(response, spec or table_spec)
+    df.columns = table_attribs_extracted
     
     df.to_csv(output_file,index=False)
     log_progress(f"Extracted table from {url} and saved to {output_file}")
     return df
 
-def transform(df, csv_path):
+exchange_rate_cache = {}
+
+def load_exchange_rates(csv_path):
+    ''' This function reads the exchange rate CSV (Currency,Rate) once per
+    file version and returns the currency codes and rates as arrays.'''
+    stat = os.stat(csv_path)
+    key = (os.path.abspath(csv_path), stat.st_mtime_ns, stat.st_size)
+    if key not in exchange_rate_cache:
+        exchange_rates = pd.read_csv(csv_path, dtype={'Currency': str, 'Rate': 'float64'})
+        exchange_rate_cache[key] = (exchange_rates['Currency'].to_numpy(dtype=object),
+                                    exchange_rates['Rate'].to_numpy(dtype='float64'))
+    return exchange_rate_cache[key]
+
+def is_rate_history(csv_path):
+    ''' This function tells whether an exchange rate file is a dated time
+    series (Date,Currency,Rate) rather than one static rate per currency.'''
+    return 'Date' in pd.read_csv(csv_path, nrows=0).columns
+
+def load_rate_history(csv_path):
+    ''' This function returns the dated exchange rates as a sorted index:
+    the currency codes and, per currency, the sorted dates (datetime64[D])
+    and matching rates. The index is cached in memory and in a .npz file next
+    to the CSV, and rebuilt only when the CSV changes. The .npz file is only
+    a cache: it is skipped when it cannot be read or written.'''
+    stat = os.stat(csv_path)
+    key = (os.path.abspath(csv_path), stat.st_mtime_ns, stat.st_size)
+    if key in exchange_rate_cache:
+        return exchange_rate_cache[key]
+
+    index_path = csv_path + '.asof.npz'
+    history = None
+    if os.path.exists(index_path):
+        try:
+            with np.load(index_path, allow_pickle=False) as index:
+                if index['source_stat'].tolist() == [stat.st_mtime_ns, stat.st_size]:
+                    currencies = index['currencies']
+                    history = (currencies, {currency: (index[f'{currency}_dates'], index[f'{currency}_rates'])
+                                            for currency in currencies})
+        except (OSError, ValueError, KeyError) as e:
+            log_progress(f"Ignoring unreadable rate index {index_path}: {e}")
+    if history is None:
+        rates = pd.read_csv(csv_path, dtype={'Currency': str, 'Rate': 'float64'}, parse_dates=['Date'])
+        rates = rates.sort_values(['Currency', 'Date'], kind='stable')
+        currencies = np.array(rates['Currency'].unique(), dtype=str)
+        series = {}
+        for currency, group in rates.groupby('Currency', sort=False):
+            series[currency] = (group['Date'].to_numpy().astype('datetime64[D]'), group['Rate'].to_numpy())
+        history = (currencies, series)
+        arrays = {'source_stat': np.array([stat.st_mtime_ns, stat.st_size]), 'currencies': currencies}
+        for currency, (dates, values) in series.items():
+            arrays[f'{currency}_dates'], arrays[f'{currency}_rates'] = dates, values
+        try:
+            np.savez(index_path, **arrays)
+        except OSError as e:
+            log_progress(f"Could not cache the rate index at {index_path}: {e}")
+    exchange_rate_cache[key] = history
+    return history
+
+def as_of_rates(dates, history):
+    ''' This function looks up, for every row date, the latest rate on or
+    before that date in each currency: one binary search per row and
+    currency, vectorized with np.searchsorted. Rows dated before the first
+    known rate get NaN. Returns the currency codes and a rows x currencies
+    rate matrix.'''
+    currencies, series = history
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    matrix = np.empty((len(dates), len(currencies)), dtype='float64')
+    for column, currency in enumerate(currencies):
+        rate_dates, rates = series[currency]
+        position = np.searchsorted(rate_dates, dates, side='right') - 1
+        matrix[:, column] = np.where(position >= 0, rates[np.clip(position, 0, None)], np.nan)
+    return currencies, matrix
+
+def convert_currencies(amounts, currencies, rates, layout='wide', decimals=2):
+    ''' This function converts every amount into every currency with one
+    broadcasted multiplication (rows x currencies). rates is either one rate
+    per currency or a rows x currencies matrix of as-of rates. The wide
+    layout returns one MC_<currency>_billion column per currency, the long
+    layout one row per (input row, currency) pair.'''
+    amounts = np.asarray(amounts, dtype='float64')
+    matrix = np.round(amounts[:, np.newaxis] * rates, decimals)
+    if layout == 'wide':
+        return pd.DataFrame(matrix, columns=[f'MC_{currency}_billion' for currency in currencies])
+    if layout == 'long':
+        return pd.DataFrame({
+            'row': np.repeat(np.arange(len(amounts)), len(currencies)),
+            'Currency': np.tile(currencies, len(amounts)),
+            'MC_billion': matrix.ravel(),
+        })
+    raise ValueError(f"Unknown layout {layout!r}, expected 'wide' or 'long'")
+
+def transform(df, csv_path, layout='wide'):
     ''' This function accesses the CSV file for exchange rate
-    information, and adds three columns to the data frame, each
-    containing the transformed version of Market Cap column to
-    respective currencies'''
+    information, and adds one column per currency in that file to the
+    data frame, each containing the transformed version of Market Cap
+    column to respective currencies. With layout='long' it returns one
+    row per bank and currency instead. If the CSV is a dated rate series
+    (Date,Currency,Rate), every row is converted at the rate in effect on
+    its Snapshot_Date (today when the data frame has no such column).'''
     
-    # Read exchange rates from CSV file
-    exchange_rates = pd.read_csv('exchange_rate.csv')  
+    # Read exchange rates from CSV file (cached between calls)
+    if is_rate_history(csv_path):
+        history = load_rate_history(csv_path)
+        if 'Snapshot_Date' in df:
+            dates = pd.to_datetime(df['Snapshot_Date']).to_numpy()
+        else:
+            dates = np.full(len(df), np.datetime64('today', 'D'))
+        currencies, rates = as_of_rates(dates, history)
+    else:
+        currencies, rates = load_exchange_rates(csv_path)
     
-    # Create a dictionary for easy lookup: currency -> rate
-    rates = dict(zip(exchange_rates['Currency'], exchange_rates['Rate']))
-    
-    # Clean the Market Cap data - remove any commas and convert to float
-    df['MC_USD_billion'] = pd.to_numeric(df['MC_USD_billion'].astype(str).str.replace(',', ''), errors='coerce')
+    # Clean the Market Cap data - remove any commas, footnotes and convert to float
+    df['MC_USD_billion'] = parse_numeric(df['MC_USD_billion'])[0]
     
     # Add USD column (same as original)
     df['Market_Cap_USD_billion'] = df['MC_USD_billion']
     
-    # Convert to other currencies using exchange rates
-    df['MC_GBP_billion'] = (df['MC_USD_billion'] * rates['GBP']).round(2)
-    df['MC_EUR_billion'] = (df['MC_USD_billion'] * rates['EUR']).round(2)
-    df['MC_INR_billion'] = (df['MC_USD_billion'] * rates['INR']).round(2)
+    # Convert to all currencies in one array operation
+    converted = convert_currencies(df['MC_USD_billion'].to_numpy(), currencies, rates, layout)
     
-    # Reorder columns to match the final attributes
-    df = df[['Name', 'Market_Cap_USD_billion', 'MC_GBP_billion', 'MC_EUR_billion', 'MC_INR_billion']]
+    keys = ['Name', 'Snapshot_Date'] if 'Snapshot_Date' in df else ['Name']
+    if layout == 'long':
+        rows = converted.pop('row').to_numpy()
+        df = pd.concat([df[keys].iloc[rows].reset_index(drop=True), converted], axis=1)
+    else:
+        converted.index = df.index
+        # Keep the familiar column order, then any extra currencies from the file
+        columns = [c for c in table_attribs_final[2:] if c in converted]
+        columns += [c for c in converted.columns if c not in columns]
+        df = pd.concat([df[keys + ['Market_Cap_USD_billion']], converted[columns]], axis=1)
     
-    log_progress(f"Converted Market Cap to GBP, EUR, and INR using exchange rates from {csv_path}")
+    log_progress(f"Converted Market Cap to {', '.join(currencies)} using exchange rates from {csv_path}")
     
     return df
 
@@ -93,19 +192,143 @@ def load_to_csv(df, output_path):
     log_progress(f"Saved data to {output_path}")
 
 
-def load_to_db(df, sql_connection, table_name):
+def load_to_db(df, sql_connection, table_name, mode='replace'):
     ''' This function saves the final data frame to a database
-    table with the provided name. Function returns nothing.'''
+    table with the provided name. mode='replace' drops and rebuilds
+    the table, mode='upsert' updates it in place (see upsert_to_db).
+    Function returns nothing.'''
+    if mode == 'upsert':
+        changed = upsert_to_db(df, sql_connection, table_name)
+        build_search_indexes(sql_connection, table_name)
+        log_progress(f"Upserted data to {table_name} table in database ({changed} rows changed)")
+        return
     df.to_sql(table_name, sql_connection, if_exists='replace', index=False)
+    build_search_indexes(sql_connection, table_name, rebuild=True)
     log_progress(f"Loaded data to {table_name} table in database")
 
+def upsert_to_db(df, sql_connection, table_name):
+    ''' This function inserts or updates the data frame rows keyed on
+    (Name, Snapshot_Date) with one executemany batch inside a single
+    transaction. The database is switched to WAL mode so readers keep
+    running during the load, the table and its secondary indexes are kept,
+    and rows whose values did not change are not rewritten. Missing key or
+    value columns are added to an existing table. Returns the number of
+    rows inserted or changed.'''
+    sql_connection.execute('PRAGMA journal_mode=WAL')
+    if 'Snapshot_Date' not in df:
+        df = df.assign(Snapshot_Date='')
+    keys = ['Name', 'Snapshot_Date']
+    values = [column for column in df.columns if column not in keys]
+    columns = keys + values
+
+    rows = df[columns].astype(object)
+    rows = list(rows.where(rows.notna(), None).itertuples(index=False, name=None))
+
+    quoted = ', '.join(f'"{column}"' for column in columns)
+    updates = ', '.join(f'"{column}" = excluded."{column}"' for column in values)
+    changed = ' OR '.join(f'"{table_name}"."{column}" IS NOT excluded."{column}"' for column in values)
+    upsert = (f'INSERT INTO "{table_name}" ({quoted}) VALUES ({", ".join("?" * len(columns))}) '
+              f'ON CONFLICT(Name, Snapshot_Date) DO UPDATE SET {updates} WHERE {changed}')
+
+    with sql_connection:
+        sql_connection.execute(f'CREATE TABLE IF NOT EXISTS "{table_name}" '
+                               f'("Name" TEXT NOT NULL, "Snapshot_Date" TEXT NOT NULL DEFAULT \'\')')
+        existing = {row[1] for row in sql_connection.execute(f'PRAGMA table_info("{table_name}")')}
+        if 'Snapshot_Date' not in existing:
+            sql_connection.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "Snapshot_Date" TEXT NOT NULL DEFAULT \'\'')
+        for column in values:
+            if column not in existing:
+                sql_type = 'REAL' if pd.api.types.is_numeric_dtype(df[column]) else 'TEXT'
+                sql_connection.execute(f'ALTER TABLE "{table_name}" ADD COLUMN "{column}" {sql_type}')
+        sql_connection.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{table_name}_name_snapshot" '
+                               f'ON "{table_name}" (Name, Snapshot_Date)')
+        cursor = sql_connection.executemany(upsert, rows)
+    return cursor.rowcount
+
+ranked_columns = ['Market_Cap_USD_billion', 'MC_GBP_billion']
+
+def build_search_indexes(sql_connection, table_name, rebuild=False):
+    ''' This function creates covering indexes for the top-N and threshold
+    queries on the market cap columns and an FTS5 index on Name, kept in
+    sync with triggers. The FTS index is (re)filled when it is first
+    created or when rebuild is set, e.g. after the table was replaced.
+    Function returns nothing.'''
+    existing = {row[1] for row in sql_connection.execute(f'PRAGMA table_info("{table_name}")')}
+    with sql_connection:
+        for column in ranked_columns:
+            if column in existing:
+                sql_connection.execute(f'CREATE INDEX IF NOT EXISTS "{table_name}_{column}_rank" '
+                                       f'ON "{table_name}" ("{column}" DESC, Name)')
+        try:
+            created = not has_search_index(sql_connection, table_name)
+            fts = f'{table_name}_fts'
+            sql_connection.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" '
+                                   f'USING fts5(Name, content="{table_name}", content_rowid="rowid")')
+            sql_connection.execute(f'CREATE TRIGGER IF NOT EXISTS "{fts}_ai" AFTER INSERT ON "{table_name}" BEGIN '
+                                   f'INSERT INTO "{fts}" (rowid, Name) VALUES (new.rowid, new.Name); END')
+            sql_connection.execute(f'CREATE TRIGGER IF NOT EXISTS "{fts}_ad" AFTER DELETE ON "{table_name}" BEGIN '
+                                   f'INSERT INTO "{fts}" ("{fts}", rowid, Name) VALUES (\'delete\', old.rowid, old.Name); END')
+            sql_connection.execute(f'CREATE TRIGGER IF NOT EXISTS "{fts}_au" AFTER UPDATE OF Name ON "{table_name}" BEGIN '
+                                   f'INSERT INTO "{fts}" ("{fts}", rowid, Name) VALUES (\'delete\', old.rowid, old.Name); '
+                                   f'INSERT INTO "{fts}" (rowid, Name) VALUES (new.rowid, new.Name); END')
+            if created or rebuild:
+                sql_connection.execute(f'INSERT INTO "{fts}" ("{fts}") VALUES (\'rebuild\')')
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: name search falls back to LIKE
+            log_progress(f"Full-text index on {table_name}.Name not available: {e}")
+
+def has_search_index(sql_connection, table_name):
+    ''' This function tells whether the FTS5 name index exists.'''
+    return sql_connection.execute("SELECT 1 FROM sqlite_master WHERE name = ?",
+                                  (f'{table_name}_fts',)).fetchone() is not None
+
+def search_banks_query(sql_connection, terms, columns=('Name', 'Market_Cap_USD_billion'), table_name=table_name):
+    ''' This function builds the name search for banks whose name contains
+    a word starting with any of the terms, ordered by market cap. It uses
+    the FTS5 index when present and LIKE otherwise. Returns the SQL and
+    its parameters.'''
+    terms = [terms] if isinstance(terms, str) else list(terms)
+    selected = ', '.join(f'b."{column}"' for column in columns)
+    if has_search_index(sql_connection, table_name):
+        match = ' OR '.join('"' + term.replace('"', '""') + '"*' for term in terms)
+        return (f'SELECT {selected} FROM "{table_name}_fts" f JOIN "{table_name}" b ON b.rowid = f.rowid '
+                f'WHERE "{table_name}_fts" MATCH ? ORDER BY b.Market_Cap_USD_billion DESC', (match,))
+    where = ' OR '.join('b.Name LIKE ?' for _ in terms)
+    return (f'SELECT {selected} FROM "{table_name}" b WHERE {where} ORDER BY b.Market_Cap_USD_billion DESC',
+            tuple(f'%{term}%' for term in terms))
+
+def search_banks(sql_connection, terms, columns=('Name', 'Market_Cap_USD_billion'), table_name=table_name):
+    ''' This function returns the rows of the banks matching the name
+    search terms (see search_banks_query).'''
+    return sql_connection.execute(*search_banks_query(sql_connection, terms, columns, table_name)).fetchall()
+
+def top_banks_query(n=None, column='Market_Cap_USD_billion', threshold=None, table_name=table_name):
+    ''' This function builds the top-N and/or threshold query on a market
+    cap column, answered from its covering index without a sort. Returns
+    the SQL and its parameters.'''
+    if column not in ranked_columns:
+        raise ValueError(f"No ranking index on {column!r}, expected one of {ranked_columns}")
+    sql = f'SELECT Name, "{column}" FROM "{table_name}"'
+    params = ()
+    if threshold is not None:
+        sql += f' WHERE "{column}" > ?'
+        params += (threshold,)
+    sql += f' ORDER BY "{column}" DESC'
+    if n is not None:
+        sql += ' LIMIT ?'
+        params += (n,)
+    return sql, params
+
+def top_banks(sql_connection, n=None, column='Market_Cap_USD_billion', threshold=None, table_name=table_name):
+    ''' This function returns the (Name, market cap) rows of the top n
+    banks and/or those above threshold (see top_banks_query).'''
+    return sql_connection.execute(*top_banks_query(n, column, threshold, table_name)).fetchall()
+
 def run_query(query_statement, sql_connection):
     ''' This function runs the query on the database table and
-    prints the output on the terminal. Function returns nothing. '''
-    cursor = sql_connection.cursor()
-    cursor.execute(query_statement)
-    result = cursor.fetchall()
-    for row in result:
+    prints the output on the terminal, streaming the rows in batches.
+    Function returns nothing. '''
+    for row in sqlite_pool.iter_rows(sql_connection, query_statement):
         print(row)
     sql_connection.commit()
 
@@ -120,11 +343,11 @@ def main():
     df = transform(df, csv_path)
     print("transformed data",df)
     load_to_csv(df, output_file)
-    sql_connection = sqlite3.connect(database_name)
-    load_to_db(df, sql_connection, table_name)
+    sql_connection = sqlite_pool.get_connection(database_name)
+    load_to_db(df, sql_connection, table_name, load_mode)
     query_statement = f"SELECT * FROM {table_name}"
     run_query(query_statement, sql_connection)
-    sql_connection.close()
+    sqlite_pool.close_all()
     log_progress('All operations completed successfully')
 
 if __name__ == '__main__':
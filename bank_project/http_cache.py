@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP fetch layer with a content-addressed disk cache.
+
+Response bodies are stored once under .http_cache/objects/<sha256>, and
+.http_cache/index.json maps each URL to its body hash plus the ETag and
+Last-Modified validators. The mode decides when the network is used:
+
+    cache       serve from disk when cached, fetch otherwise (default)
+    revalidate  send a conditional request (If-None-Match / If-Modified-Since)
+                and reuse the cached body on 304 Not Modified
+    refresh     always fetch and replace the cached copy
+    offline     never touch the network; fail if the URL is not cached
+
+The mode can be set per call or with the HTTP_CACHE_MODE environment
+variable, and the cache location with HTTP_CACHE_DIR.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import requests
+
+CACHE_DIR = os.environ.get("HTTP_CACHE_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"))
+MODES = ("cache", "revalidate", "refresh", "offline")
+
+
+class OfflineCacheMiss(Exception):
+    """Raised in offline mode when the requested URL is not in the cache"""
+
+
+class CachedResponse:
+    """The parts of a requests.Response that the scraping scripts use"""
+
+    def __init__(self, url, status_code, content, encoding, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via a temporary file so readers never see a partial file"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _load_index(cache_dir):
+    index_path = os.path.join(cache_dir, "index.json")
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path) as f:
+        return json.load(f)
+
+
+def _save_index(cache_dir, index):
+    _write_atomic(os.path.join(cache_dir, "index.json"), json.dumps(index, indent=2).encode())
+
+
+def _object_path(cache_dir, digest):
+    return os.path.join(cache_dir, "objects", digest)
+
+
+def _read_cached(cache_dir, url, entry):
+    with open(_object_path(cache_dir, entry["sha256"]), "rb") as f:
+        content = f.read()
+    return CachedResponse(url, entry["status_code"], content, entry.get("encoding"), from_cache=True)
+
+
+def get(url, mode=None, session=None, timeout=30, cache_dir=None):
+    """
+    Fetch a URL through the disk cache
+
+    Args:
+        url (str): URL to fetch
+        mode (str): One of MODES; defaults to $HTTP_CACHE_MODE or "cache"
+        session (requests.Session): Optional session to reuse connections
+        timeout (float): Request timeout in seconds
+        cache_dir (str): Cache directory; defaults to CACHE_DIR
+
+    Returns:
+        CachedResponse: Status code, body and whether it came from disk
+    """
+    mode = mode or os.environ.get("HTTP_CACHE_MODE", "cache")
+    if mode not in MODES:
+        raise ValueError(f"Unknown cache mode {mode!r}, expected one of {MODES}")
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(os.path.join(cache_dir, "objects"), exist_ok=True)
+
+    index = _load_index(cache_dir)
+    entry = index.get(url)
+    if entry and not os.path.exists(_object_path(cache_dir, entry["sha256"])):
+        entry = None
+
+    if entry and mode in ("cache", "offline"):
+        return _read_cached(cache_dir, url, entry)
+    if mode == "offline":
+        raise OfflineCacheMiss(f"{url} is not in the HTTP cache at {cache_dir}")
+
+    headers = {}
+    if entry and mode == "revalidate":
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = (session or requests).get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and entry:
+        entry["checked_at"] = datetime.now().isoformat()
+        index[url] = entry
+        _save_index(cache_dir, index)
+        return _read_cached(cache_dir, url, entry)
+
+    if response.status_code != 200:
+        # Errors are passed through but never cached
+        return CachedResponse(url, response.status_code, response.content, response.encoding, from_cache=False)
+
+    digest = hashlib.sha256(response.content).hexdigest()
+    if not os.path.exists(_object_path(cache_dir, digest)):
+        _write_atomic(_object_path(cache_dir, digest), response.content)
+    index = _load_index(cache_dir) # re-read in case another script updated it meanwhile
+    index[url] = {
+        "sha256": digest,
+        "status_code": response.status_code,
+        "encoding": response.encoding,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "fetched_at": datetime.now().isoformat(),
+    }
+    _save_index(cache_dir, index)
+    return CachedResponse(url, response.status_code, response.content, response.encoding, from_cache=False)
+
+
+def get_text(url, mode=None, session=None, timeout=30):
+    """Fetch a URL through the disk cache and return the body as text"""
+    return get(url, mode, session, timeout).text
@@ -3,12 +3,73 @@
 Script to run SQL queries on the banks database and show complete output
 """
 
-import sqlite3
+import os
+import sys
 import pandas as pd
+from banks_project import search_banks_query, top_banks_query
 
-def run_sql_queries():
-    """Run various SQL queries on the banks database"""
-    
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import sqlite_pool
+
+class QueryRunner:
+    """Runs queries on one connection and caches their results
+
+    Results are keyed on the SQL text and parameters and are reused as long as
+    SQLite's PRAGMA data_version (bumped by commits from other connections)
+    and this connection's own change counter are unchanged, so refreshing
+    against unchanged data does not touch the table again. Parameterized SQL
+    keeps the text identical between refreshes, so sqlite3's statement cache
+    reuses the prepared statements.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cache = {}
+
+    def version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0], self.conn.total_changes
+
+    def query(self, sql, params=()):
+        """Return (column names, rows) for a query, from the cache when still valid"""
+        version = self.version()
+        key = (sql, tuple(params))
+        cached = self.cache.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+        cursor = self.conn.execute(sql, params)
+        result = ([column[0] for column in cursor.description], cursor.fetchall())
+        self.cache[key] = (version, result)
+        return result
+
+    def frame(self, sql, params=()):
+        """Return a query result as a DataFrame"""
+        columns, rows = self.query(sql, params)
+        return pd.DataFrame(rows, columns=columns)
+
+
+def summary_query(table_name):
+    """One scan computing the count, averages and min/max shown by queries 2, 5 and 10"""
+    return f"""
+        SELECT 
+            COUNT(*) as Total_Banks,
+            ROUND(AVG(Market_Cap_USD_billion), 2) as Avg_USD_Billion,
+            ROUND(AVG(MC_GBP_billion), 2) as Avg_GBP_Billion,
+            ROUND(AVG(MC_EUR_billion), 2) as Avg_EUR_Billion,
+            ROUND(AVG(MC_INR_billion), 2) as Avg_INR_Billion,
+            MIN(Market_Cap_USD_billion) as Min_USD,
+            MAX(Market_Cap_USD_billion) as Max_USD,
+            MIN(MC_GBP_billion) as Min_GBP,
+            MAX(MC_GBP_billion) as Max_GBP
+        FROM {table_name}
+        """
+
+
+def run_sql_queries(runner=None):
+    """Run various SQL queries on the banks database
+
+    Pass the runner returned by a previous call to reuse its connection and
+    result cache, e.g. for a dashboard that refreshes periodically.
+    """
     database_name = 'banks.db'
     table_name = 'largest_banks'
     
@@ -16,101 +77,68 @@ def run_sql_queries():
     
     try:
         # Connect to database
-        conn = sqlite3.connect(database_name)
-        print(f"✅ Connected to database: {database_name}")
+        if runner is None:
+            runner = QueryRunner(sqlite_pool.get_connection(database_name))
+            print(f"✅ Connected to database: {database_name}")
+        
+        # Count, averages and min/max come from a single scan of the table
+        summary = runner.frame(summary_query(table_name))
         
         # Query 1: Show all data
         print(f"\n🗄️  QUERY 1: SELECT * FROM {table_name}")
         print("=" * 80)
         query1 = f"SELECT * FROM {table_name}"
-        df1 = pd.read_sql_query(query1, conn)
+        df1 = runner.frame(query1)
         print(df1.to_string(index=False))
         
         # Query 2: Count total records
         print(f"\n📊 QUERY 2: SELECT COUNT(*) FROM {table_name}")
         print("=" * 50)
-        query2 = f"SELECT COUNT(*) as Total_Banks FROM {table_name}"
-        df2 = pd.read_sql_query(query2, conn)
+        df2 = summary[['Total_Banks']]
         print(df2.to_string(index=False))
         
         # Query 3: Top 5 banks by USD Market Cap
         print(f"\n🏆 QUERY 3: TOP 5 BANKS BY USD MARKET CAP")
         print("=" * 60)
-        query3 = f"""
-        SELECT Name, Market_Cap_USD_billion 
-        FROM {table_name} 
-        ORDER BY Market_Cap_USD_billion DESC 
-        LIMIT 5
-        """
-        df3 = pd.read_sql_query(query3, conn)
+        df3 = runner.frame(*top_banks_query(5, table_name=table_name))
         print(df3.to_string(index=False))
         
         # Query 4: Banks with Market Cap > 200B USD
         print(f"\n💰 QUERY 4: BANKS WITH MARKET CAP > $200B USD")
         print("=" * 60)
-        query4 = f"""
-        SELECT Name, Market_Cap_USD_billion 
-        FROM {table_name} 
-        WHERE Market_Cap_USD_billion > 200
-        ORDER BY Market_Cap_USD_billion DESC
-        """
-        df4 = pd.read_sql_query(query4, conn)
+        df4 = runner.frame(*top_banks_query(threshold=200, table_name=table_name))
         print(df4.to_string(index=False))
         
         # Query 5: Average Market Cap by currency
         print(f"\n📈 QUERY 5: AVERAGE MARKET CAP BY CURRENCY")
         print("=" * 60)
-        query5 = f"""
-        SELECT 
-            ROUND(AVG(Market_Cap_USD_billion), 2) as Avg_USD_Billion,
-            ROUND(AVG(MC_GBP_billion), 2) as Avg_GBP_Billion,
-            ROUND(AVG(MC_EUR_billion), 2) as Avg_EUR_Billion,
-            ROUND(AVG(MC_INR_billion), 2) as Avg_INR_Billion
-        FROM {table_name}
-        """
-        df5 = pd.read_sql_query(query5, conn)
+        df5 = summary[['Avg_USD_Billion', 'Avg_GBP_Billion', 'Avg_EUR_Billion', 'Avg_INR_Billion']]
         print(df5.to_string(index=False))
         
         # Query 6: Specific bank details
         print(f"\n🏦 QUERY 6: JPMORGAN CHASE DETAILS (ALL CURRENCIES)")
         print("=" * 70)
-        query6 = f"""
-        SELECT Name, Market_Cap_USD_billion, MC_GBP_billion, MC_EUR_billion, MC_INR_billion
-        FROM {table_name} 
-        WHERE Name LIKE '%JPMorgan%'
-        """
-        df6 = pd.read_sql_query(query6, conn)
+        columns = ('Name', 'Market_Cap_USD_billion', 'MC_GBP_billion', 'MC_EUR_billion', 'MC_INR_billion')
+        df6 = runner.frame(*search_banks_query(runner.conn, 'JPMorgan', columns, table_name))
         print(df6.to_string(index=False))
         
         # Query 7: Chinese banks
         print(f"\n🇨🇳 QUERY 7: CHINESE BANKS")
         print("=" * 50)
-        query7 = f"""
-        SELECT Name, Market_Cap_USD_billion 
-        FROM {table_name} 
-        WHERE Name LIKE '%China%' OR Name LIKE '%Chinese%'
-        ORDER BY Market_Cap_USD_billion DESC
-        """
-        df7 = pd.read_sql_query(query7, conn)
+        df7 = runner.frame(*search_banks_query(runner.conn, ['China', 'Chinese'], table_name=table_name))
         print(df7.to_string(index=False))
         
         # Query 8: Banks ranked by GBP Market Cap
         print(f"\n💷 QUERY 8: BANKS RANKED BY GBP MARKET CAP")
         print("=" * 60)
-        query8 = f"""
-        SELECT Name, MC_GBP_billion 
-        FROM {table_name} 
-        ORDER BY MC_GBP_billion DESC
-        """
-        df8 = pd.read_sql_query(query8, conn)
+        df8 = runner.frame(*top_banks_query(column='MC_GBP_billion', table_name=table_name))
         print(df8.to_string(index=False))
         
         # Query 9: Database schema info
         print(f"\n🔧 QUERY 9: TABLE SCHEMA INFORMATION")
         print("=" * 50)
         query9 = f"PRAGMA table_info({table_name})"
-        cursor = conn.execute(query9)
-        schema_info = cursor.fetchall()
+        _, schema_info = runner.query(query9)
         print("Column_ID | Column_Name              | Data_Type | Not_Null | Default | Primary_Key")
         print("-" * 80)
         for row in schema_info:
@@ -119,23 +147,16 @@ def run_sql_queries():
         # Query 10: Min and Max values
         print(f"\n📊 QUERY 10: MIN/MAX MARKET CAP VALUES")
         print("=" * 60)
-        query10 = f"""
-        SELECT 
-            MIN(Market_Cap_USD_billion) as Min_USD,
-            MAX(Market_Cap_USD_billion) as Max_USD,
-            MIN(MC_GBP_billion) as Min_GBP,
-            MAX(MC_GBP_billion) as Max_GBP
-        FROM {table_name}
-        """
-        df10 = pd.read_sql_query(query10, conn)
+        df10 = summary[['Min_USD', 'Max_USD', 'Min_GBP', 'Max_GBP']]
         print(df10.to_string(index=False))
         
         print(f"\n✅ All SQL queries completed successfully!")
         
-        conn.close()
-        
     except Exception as e:
         print(f"❌ Error running SQL queries: {e}")
+    
+    return runner
 
 if __name__ == '__main__':
-    run_sql_queries() 
\ No newline at end of file
+    run_sql_queries()
+    sqlite_pool.close_all()
\ No newline at end of file
@@ -4,7 +4,7 @@ Script to show detailed first row information with expanded HTML structure
 Perfect for screenshots of the first row data
 """
 
-import requests
+import http_cache
 from bs4 import BeautifulSoup
 from banks_project import url
 
@@ -17,7 +17,7 @@ def show_first_row_detailed():
     print(f"📍 URL: {url}")
     
     # Get the webpage content
-    response = requests.get(url)
+    response = http_cache.get(url)
     soup = BeautifulSoup(response.text, "html.parser")
     
     # Find the target table
@@ -4,7 +4,7 @@ Script to show the actual HTML structure of the banks table
 This helps understand what the web scraping code sees
 """
 
-import requests
+import http_cache
 from bs4 import BeautifulSoup
 from banks_project import url
 
@@ -18,7 +18,7 @@ def show_html_structure():
     
     # Get the webpage content
     print("\n🌐 Fetching webpage...")
-    response = requests.get(url)
+    response = http_cache.get(url)
     soup = BeautifulSoup(response.text, "html.parser")
     
     # Find the target table
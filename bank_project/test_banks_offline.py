@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Offline test of the banks ETL: extract and transform run against a local
+stand-in page instead of web.archive.org, with a throwaway HTTP cache.
+
+    python -m pytest test_banks_offline.py
+    python test_banks_offline.py
+"""
+
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import banks_project
+import http_cache
+from common import wikitable
+
+BANKS = [("JPMorgan Chase", "432.92"), ("Bank of America", "231.52[2]"), ("HSBC Holdings PLC", "1,148.90")]
+GDP_SPEC = {"classes": ("wikitable",),
+            "columns": [("Country", "Country", "string"), ("IMF", "GDP", "float64")]}
+RATES_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exchange_rate.csv")
+
+
+def banks_page():
+    """A page laid out like the archived list: a decoy table, then the wikitable with a spanning note row"""
+    rows = "".join(
+        f"<tr><td>{rank}</td><td><span class='flagicon'></span>&nbsp;<a href='#'>{name}</a></td><td>{cap}</td></tr>"
+        for rank, (name, cap) in enumerate(BANKS, start=1)
+    )
+    return f"""<html><body>
+    <table class="box-More_citations_needed"><tr><td>note</td></tr></table>
+    <table class="wikitable sortable mw-collapsible">
+    <tr><th>Rank</th><th>Bank name</th><th>Market cap<br>(US$ billion)<sup>[1]</sup></th></tr>
+    {rows}
+    <tr><td colspan="3">Note: figures as of the snapshot date</td></tr>
+    </table></body></html>"""
+
+
+class StandInArchive(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = banks_page().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_extract_and_transform():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInArchive)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    saved = http_cache.CACHE_DIR, banks_project.output_file, banks_project.log_file
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            http_cache.CACHE_DIR = os.path.join(tmp, "cache")
+            banks_project.output_file = os.path.join(tmp, "largest_banks_data.csv")
+            banks_project.log_file = os.path.join(tmp, "code_log.txt")
+            df = banks_project.extract(f"http://{host}:{port}/banks.html", banks_project.table_attribs_extracted)
+            assert os.path.exists(banks_project.output_file)
+            df = banks_project.transform(df, RATES_CSV)
+    finally:
+        http_cache.CACHE_DIR, banks_project.output_file, banks_project.log_file = saved
+        server.shutdown()
+
+    assert list(df.columns) == banks_project.table_attribs_final
+    assert list(df["Name"]) == [name for name, _ in BANKS]
+    assert list(df["Market_Cap_USD_billion"]) == [432.92, 231.52, 1148.90]
+    assert df["MC_GBP_billion"].iloc[0] == round(432.92 * 0.8, 2)
+    assert df["MC_INR_billion"].iloc[2] == round(1148.90 * 82.95, 2)
+
+
+def extract_both_ways(html, spec):
+    """Run extract_table with lxml (when installed) and with the html.parser fallback"""
+    results = [wikitable.extract_table(html, spec)]
+    etree, wikitable.etree = wikitable.etree, None
+    try:
+        results.append(wikitable.extract_table(html, spec))
+    finally:
+        wikitable.etree = etree
+    return [list(df.itertuples(index=False, name=None)) for df in results]
+
+
+def test_extract_table_expands_rowspans():
+    html = """<table class="wikitable">
+    <tr><th>Country</th><th>Region</th><th>IMF</th><th>Year</th></tr>
+    <tr><td rowspan="2">Sudan</td><td>Africa</td><td>5</td><td>2020</td></tr>
+    <tr><td>Asia</td><td>6</td><td>2021</td></tr>
+    <tr><td>Chad</td><td rowspan="2">Africa</td><td>7</td><td>2022</td></tr>
+    <tr><td>Mali</td><td>8</td><td>2023</td></tr>
+    </table>"""
+    for rows in extract_both_ways(html, GDP_SPEC):
+        assert rows == [("Sudan", 5.0), ("Sudan", 6.0), ("Chad", 7.0), ("Mali", 8.0)]
+
+
+def test_extract_table_ignores_nested_tables():
+    html = """<table class="wikitable">
+    <tr><th>Country</th><th>IMF</th></tr>
+    <tr><td>Chad<table class="wikitable"><tr><th>Country</th><th>IMF</th></tr>
+        <tr><td>inner</td><td>9</td></tr></table></td><td>7</td></tr>
+    </table>"""
+    for rows in extract_both_ways(html, GDP_SPEC):
+        assert rows == [("Chad", 7.0)]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
@@ -4,7 +4,7 @@ Test script to specifically run and display the detailed output of the extract f
 """
 
 import pandas as pd
-import requests
+import http_cache
 from bs4 import BeautifulSoup
 from banks_project import url, table_attribs_extracted, log_progress
 
@@ -19,8 +19,8 @@ def test_extract():
     
     # Step 1: Get the webpage content
     print("\n🌐 Step 1: Fetching webpage...")
-    response = requests.get(url)
-    print(f"✅ Status code: {response.status_code}")
+    response = http_cache.get(url)
+    print(f"✅ Status code: {response.status_code} ({'disk cache' if response.from_cache else 'network'})")
     
     # Step 2: Parse with BeautifulSoup
     print("\n🍲 Step 2: Parsing HTML with BeautifulSoup...")
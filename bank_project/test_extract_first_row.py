@@ -4,7 +4,7 @@ Script to test and display the first row details from extract function
 """
 
 import pandas as pd
-import requests
+import http_cache
 from bs4 import BeautifulSoup
 from banks_project import url, table_attribs_extracted
 
@@ -18,7 +18,7 @@ def test_extract_first_row():
     print(f"📋 Target attributes: {table_attribs_extracted}")
     
     # Perform the extract process
-    response = requests.get(url)
+    response = http_cache.get(url)
     soup = BeautifulSoup(response.text, "html.parser")
     
     # Find the correct table
@@ -0,0 +1 @@
+"""Helpers shared by the ETL projects in this repository."""
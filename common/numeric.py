@@ -0,0 +1,37 @@
+"""
+Numeric cleaning for figures scraped from Wikipedia-style tables.
+
+Scraped cells carry thousands separators, em/en dashes for missing values,
+footnote markers such as [n 1] and stray whitespace. parse_numeric() strips
+all of them with one precompiled regular expression in a single vectorized
+pass, then converts to float64.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Footnote markers like [1] or [n 1], thousands separators, em/en dashes and
+# any whitespace (including non-breaking spaces)
+NOISE = re.compile(r"\[[^\]]*\]|[,—–\s]")
+
+
+def parse_numeric(values):
+    """
+    Parse scraped figures to float64
+
+    Args:
+        values (array-like): Strings or numbers, e.g. a DataFrame column
+
+    Returns:
+        tuple: (numpy.ndarray of float64, numpy.ndarray of bool marking rows
+               that could not be parsed and are NaN)
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_numeric_dtype(series):
+        parsed = series.to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        cleaned = series.astype("string").str.replace(NOISE, "", regex=True)
+        parsed = pd.to_numeric(cleaned, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return parsed, np.isnan(parsed)
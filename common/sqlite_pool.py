@@ -0,0 +1,96 @@
+"""
+Shared SQLite connection manager.
+
+Every thread gets one pooled connection per database file, opened on first
+use with the standard PRAGMAs applied once (WAL journal, synchronous=NORMAL,
+memory-mapped I/O and a larger page cache). Query results can be streamed
+with iter_rows(), which pulls rows in fetchmany() batches instead of
+materializing the whole result.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,  # bytes
+    "cache_size": -64 * 1024,        # negative means KiB, i.e. 64 MiB
+}
+FETCH_SIZE = 1000
+
+_local = threading.local()
+_all_connections = []
+_lock = threading.Lock()
+
+
+def get_connection(db_path, pragmas=PRAGMAS):
+    """
+    Return this thread's pooled connection to a database
+
+    Args:
+        db_path (str): Path to the SQLite database file
+        pragmas (dict): PRAGMAs applied when the connection is opened
+
+    Returns:
+        sqlite3.Connection: The pooled connection
+    """
+    pool = getattr(_local, "connections", None)
+    if pool is None:
+        pool = _local.connections = {}
+    key = os.path.abspath(db_path)
+    conn = pool.get(key)
+    if conn is None:
+        conn = sqlite3.connect(db_path)
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        pool[key] = conn
+        with _lock:
+            _all_connections.append(conn)
+    return conn
+
+
+def iter_rows(conn, query, params=(), size=FETCH_SIZE):
+    """
+    Execute a query and yield its rows, fetching size rows at a time
+
+    Args:
+        conn (sqlite3.Connection or str): Connection, or database path to use the pool
+        query (str): SQL statement
+        params (tuple): Query parameters
+        size (int): Rows fetched per fetchmany() call
+
+    Yields:
+        tuple: One result row
+    """
+    if isinstance(conn, (str, os.PathLike)):
+        conn = get_connection(conn)
+    cursor = conn.execute(query, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def close_all():
+    """Close every pooled connection, in all threads"""
+    with _lock:
+        connections = list(_all_connections)
+        _all_connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass  # created in a thread that has exited; closed with it
+    pool = getattr(_local, "connections", None)
+    if pool is not None:
+        pool.clear()
+
+
+atexit.register(close_all)
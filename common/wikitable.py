@@ -0,0 +1,266 @@
+"""
+Schema-driven extraction of Wikipedia-style HTML tables.
+
+A table is described by a declarative spec instead of parsing code:
+
+    BANKS_TABLE = {
+        "classes": ("wikitable", "sortable"),   # the table must carry all of these
+        "index": 0,                              # which matching table (default 0)
+        "columns": [                             # (header, output name, dtype)
+            ("Bank name", "Name", "string"),
+            ("Market cap", "MC_USD_billion", "float64"),
+        ],
+    }
+
+A header matches the first column whose top header cell starts with it
+(case-insensitive, footnote markers such as [1] ignored, colspans
+expanded); an int selects a column by position instead. The page is
+streamed until the selected table is closed, and only the selected
+columns of each data row are turned into text and then into typed
+arrays: float64 and Int64 go through common.numeric.parse_numeric, any
+other dtype through pandas.array. Data rows too short to reach every
+selected column, and rows where no selected column starts a cell (notes
+or footers spanning the table), are skipped. A cell with a rowspan is
+repeated at its column in the rows it spans, as pandas.read_html does.
+A matching table nested inside another matching table is part of the
+outer one, and the text of tables nested in a cell is left out of it.
+"""
+
+import re
+from html.parser import HTMLParser
+
+import pandas as pd
+
+from common.numeric import parse_numeric
+
+try:
+    from lxml import etree  # optional fast path
+except ImportError:
+    etree = None
+
+CHUNK_SIZE = 65536
+FOOTNOTE = re.compile(r"\[[^\]]*\]")
+
+
+def _normalize(text):
+    return " ".join(FOOTNOTE.sub("", text).split()).lower()
+
+
+def _span(value):
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+class TableAssembler:
+    """Turns the rows of the selected table into typed columns"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.header_rows = []
+        self.selected = None  # column position -> output name
+        self.pending = {}  # column position -> (rows left, tag, colspan, text) of open rowspans
+        self.values = {name: [] for _, name, _ in spec["columns"]}
+
+    def _expand_rowspans(self, cells):
+        """Insert the cells carried down by earlier rowspans at their positions"""
+        pending, self.pending = self.pending, {}
+        expanded = []
+        position = 0
+
+        def carry(until):
+            nonlocal position
+            for start in sorted(p for p in pending if p <= until):
+                left, tag, colspan, text = pending.pop(start)
+                expanded.append((tag, colspan, text))
+                if left > 1:
+                    self.pending[start] = (left - 1, tag, colspan, text)
+                position = start + colspan
+
+        for tag, colspan, rowspan, text in cells:
+            carry(position)
+            if rowspan > 1:
+                text = text() if callable(text) else text
+                self.pending[position] = (rowspan - 1, tag, colspan, text)
+            expanded.append((tag, colspan, text))
+            position += colspan
+        while pending:
+            carry(max(pending))
+        return expanded
+
+    def row(self, cells):
+        """Add one row given as (tag, colspan, rowspan, text) tuples; text
+        may be a callable so that unselected cells are never converted to text"""
+        cells = self._expand_rowspans(cells)
+        if self.selected is None:
+            if not any(tag == "td" for tag, _, _ in cells):
+                self.header_rows.append(cells)
+                return
+            self._resolve()
+
+        if sum(colspan for _, colspan, _ in cells) <= self.last:
+            return
+        row = {}
+        position = 0
+        for _, colspan, text in cells:
+            if position in self.selected:
+                row[self.selected[position]] = text
+            position += colspan
+        if not row:
+            return
+        row = {name: text() if callable(text) else text for name, text in row.items()}
+        for name, values in self.values.items():
+            values.append(row.get(name))
+
+    def _resolve(self):
+        labels = []
+        if self.header_rows:
+            for _, colspan, text in self.header_rows[0]:
+                label = _normalize(text() if callable(text) else text)
+                labels.extend([label] * colspan)
+        self.selected = {}
+        for header, name, _ in self.spec["columns"]:
+            if isinstance(header, int):
+                self.selected[header] = name
+                continue
+            wanted = _normalize(header)
+            matches = [i for i, label in enumerate(labels) if label.startswith(wanted)]
+            if not matches:
+                raise ValueError(f"Column {header!r} not found in table header {labels}")
+            self.selected[matches[0]] = name
+        self.last = max(self.selected)
+
+    def frame(self):
+        """Return the collected columns as a typed DataFrame"""
+        columns = {}
+        for _, name, dtype in self.spec["columns"]:
+            values = self.values[name]
+            if dtype in ("float64", "Int64"):
+                parsed = pd.Series(parse_numeric(pd.Series(values, dtype="object"))[0])
+                columns[name] = parsed if dtype == "float64" else parsed.astype("Int64")
+            else:
+                columns[name] = pd.array(values, dtype=dtype)
+        return pd.DataFrame(columns)
+
+
+def _cell_text(parts):
+    return " ".join("".join(parts).split())
+
+
+def _matches(classes, spec):
+    return all(cls in classes for cls in spec["classes"])
+
+
+class _StreamingTableParser(HTMLParser):
+    """html.parser fallback: feeds rows of the selected table to the assembler"""
+
+    def __init__(self, spec, assembler):
+        super().__init__(convert_charrefs=True)
+        self.spec = spec
+        self.assembler = assembler
+        self.skip = spec.get("index", 0)
+        self.depth = 0  # table nesting depth inside the selected table
+        self.done = False
+        self.row = None
+        self.cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            if self.depth:
+                self.depth += 1
+            elif _matches((dict(attrs).get("class") or "").split(), self.spec):
+                if self.skip:
+                    self.skip -= 1
+                else:
+                    self.depth = 1
+        elif self.depth == 1 and tag == "tr":
+            self.row = []
+        elif self.depth == 1 and tag in ("td", "th") and self.row is not None:
+            attrs = dict(attrs)
+            self.cell = (tag, _span(attrs.get("colspan")), _span(attrs.get("rowspan")), [])
+
+    def handle_endtag(self, tag):
+        if not self.depth or self.done:
+            return
+        if tag == "table":
+            self.depth -= 1
+            self.done = self.depth == 0
+        elif self.depth == 1 and tag in ("td", "th") and self.cell is not None:
+            cell_tag, colspan, rowspan, parts = self.cell
+            self.row.append((cell_tag, colspan, rowspan, lambda parts=parts: _cell_text(parts)))
+            self.cell = None
+        elif self.depth == 1 and tag == "tr" and self.row is not None:
+            self.assembler.row(self.row)
+            self.row = None
+
+    def handle_data(self, data):
+        if self.cell is not None and self.depth == 1:
+            self.cell[3].append(data)
+
+
+def _element_text(element):
+    """Text of an element without the text of tables nested in it"""
+    parts = [element.text or ""]
+    for child in element:
+        if isinstance(child.tag, str) and child.tag != "table":  # skips comments too
+            parts.append(_element_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _extract_lxml(html, spec, assembler):
+    parser = etree.HTMLPullParser(events=("end",), tag="table")
+    skip = spec.get("index", 0)
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+        for _, table in parser.read_events():
+            if not _matches((table.get("class") or "").split(), spec):
+                continue
+            if any(_matches((outer.get("class") or "").split(), spec) for outer in table.iterancestors("table")):
+                continue  # the outer table closes later and is the one selected
+            if skip:
+                skip -= 1
+                continue
+            for tr in table.iter("tr"):
+                if tr.getparent() is not table and tr.getparent().getparent() is not table:
+                    continue  # row of a nested table
+                assembler.row([(cell.tag, _span(cell.get("colspan")), _span(cell.get("rowspan")),
+                                lambda cell=cell: _cell_text(_element_text(cell)))
+                               for cell in tr if cell.tag in ("td", "th")])
+            return True
+    return False
+
+
+def extract_table(html, spec):
+    """
+    Extract the table described by spec from an HTML page
+
+    Args:
+        html (str): Page source
+        spec (dict): Table spec, see the module docstring
+
+    Returns:
+        pandas.DataFrame: One typed column per spec column
+
+    Raises:
+        ValueError: If no matching table or header is found
+    """
+    assembler = TableAssembler(spec)
+    if etree is not None:
+        found = _extract_lxml(html, spec, assembler)
+    else:
+        parser = _StreamingTableParser(spec, assembler)
+        for start in range(0, len(html), CHUNK_SIZE):
+            parser.feed(html[start:start + CHUNK_SIZE])
+            if parser.done:
+                break
+        found = parser.done
+    if not found:
+        classes = " and ".join(f"'{cls}'" for cls in spec["classes"])
+        raise ValueError(f"Could not find a table with both {classes} classes")
+    if assembler.selected is None:
+        assembler._resolve()  # header-only table
+    return assembler.frame()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the etl_code pipeline phases.
+
+Generates synthetic source directories in the name/height/weight schema at a
+configurable scale and format mix, times every phase in a fresh process and
+saves rows/s and peak RSS per phase as JSON, so runs can be compared.
+
+    python benchmark.py --rows 200000 --mix csv=3,json=3,xml=3 --output bench.json
+    python benchmark.py --rows 200000 --compare bench.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import etl_code
+
+NAMES = ["alex", "ajay", "alice", "ravi", "joe", "jack", "tom", "tracy", "john",
+         "simon", "jacob", "cindy", "ivan"]
+PHASES = ["extract_from_csv", "extract_from_json", "extract_from_xml", "extract", "transform", "load_data"]
+
+
+def generate_frame(rows, seed):
+    """Return a random data frame in the source schema (inches and pounds)"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "name": rng.choice(NAMES, size=rows),
+        "height": rng.normal(68, 3, size=rows).round(2),
+        "weight": rng.normal(130, 15, size=rows).round(2),
+    })
+
+
+def write_xml(dataframe, path):
+    """Write a data frame in the <data><person>...</person></data> source layout"""
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<data>\n')
+        for name, height, weight in dataframe.itertuples(index=False):
+            f.write(f"   <person>\n      <name>{name}</name>\n      <height>{height}</height>\n"
+                    f"      <weight>{weight}</weight>\n   </person>\n")
+        f.write("</data>\n")
+
+
+def generate_source_dir(source_dir, rows_per_file, mix, seed=0):
+    """
+    Generate a source directory of synthetic files
+
+    Args:
+        source_dir (str): Directory to create the files in
+        rows_per_file (int): Number of records in every file
+        mix (dict): Number of files per format, e.g. {"csv": 3, "json": 3, "xml": 3}
+        seed (int): Seed for the random generator
+
+    Returns:
+        dict: Number of rows generated per format
+    """
+    os.makedirs(source_dir, exist_ok=True)
+    rows = {}
+    for extension, count in mix.items():
+        for i in range(count):
+            dataframe = generate_frame(rows_per_file, seed)
+            seed += 1
+            path = os.path.join(source_dir, f"source{i + 1}.{extension}")
+            if extension == "csv":
+                dataframe.to_csv(path, index=False)
+            elif extension == "json":
+                dataframe.to_json(path, orient="records", lines=True)
+            elif extension == "xml":
+                write_xml(dataframe, path)
+            else:
+                raise ValueError(f"Unknown source format: {extension}")
+        rows[extension] = rows_per_file * count
+    return rows
+
+
+def run_phase(phase, source_dir, work_dir, results):
+    """Run one phase in the current process and put its metrics on the results queue"""
+    readers = {"extract_from_csv": ("csv", etl_code.extract_from_csv),
+               "extract_from_json": ("json", etl_code.extract_from_json),
+               "extract_from_xml": ("xml", etl_code.extract_from_xml)}
+
+    # Prepare the phase input outside of the timed section
+    if phase in ("transform", "load_data"):
+        data = etl_code.extract(source_dir)
+        if phase == "load_data":
+            data = etl_code.transform(data)
+    rss_before = etl_code.peak_rss_mb()
+    etl_code.reset_peak_rss() # leave the phase input preparation out of the peak
+
+    start = time.perf_counter()
+    if phase in readers:
+        extension, reader = readers[phase]
+        rows = sum(len(reader(path)) for path, ext in etl_code.list_source_files(source_dir) if ext == extension)
+    elif phase == "extract":
+        rows = len(etl_code.extract(source_dir))
+    elif phase == "transform":
+        rows = len(etl_code.transform(data))
+    else:
+        etl_code.load_data(os.path.join(work_dir, "transformed_data.csv"), data)
+        rows = len(data)
+    seconds = time.perf_counter() - start
+
+    results.put({
+        "phase": phase,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_s": round(rows / seconds, 1) if seconds else None,
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(etl_code.peak_rss_mb(), 1),
+    })
+
+
+def measure(phase, source_dir, work_dir, poll_seconds=1.0):
+    """Run a phase in a fresh process so its peak RSS is not hidden by earlier phases"""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=run_phase, args=(phase, source_dir, work_dir, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=poll_seconds)
+            break
+        except queue.Empty:
+            if process.exitcode is None:
+                continue
+            try:
+                result = results.get(timeout=poll_seconds)  # put just before exiting
+                break
+            except queue.Empty:
+                raise RuntimeError(f"Phase {phase} failed in its worker process "
+                                   f"(exit code {process.exitcode})") from None
+    process.join()
+    return result
+
+
+def run_benchmark(rows_per_file, mix, phases=PHASES, repeat=1, seed=0):
+    """
+    Generate a synthetic source directory and time each pipeline phase
+
+    Args:
+        rows_per_file (int): Number of records in every generated file
+        mix (dict): Number of files per format
+        phases (list): Phases to measure
+        repeat (int): Runs per phase; the fastest run is kept
+        seed (int): Seed for the random generator
+
+    Returns:
+        dict: Benchmark metadata and per-phase metrics
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_dir = os.path.join(work_dir, "source")
+        generated = generate_source_dir(source_dir, rows_per_file, mix, seed)
+        source_bytes = sum(os.path.getsize(path) for path, _ in etl_code.list_source_files(source_dir))
+
+        measured = []
+        for phase in phases:
+            if phase.startswith("extract_from_") and not mix.get(phase.rsplit("_", 1)[1]):
+                continue
+            runs = [measure(phase, source_dir, work_dir) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run["seconds"])
+            measured.append(best)
+            print(f"{phase:<18} {best['rows']:>10} rows {best['seconds']:>10.3f}s "
+                  f"{best['rows_per_s'] or 0:>14,.0f} rows/s {best['peak_rss_mb']:>9.1f} MB peak RSS")
+
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "rows_per_file": rows_per_file,
+        "mix": mix,
+        "rows": generated,
+        "source_bytes": source_bytes,
+        "phases": measured,
+    }
+
+
+def check_baseline(baseline, rows_per_file, mix):
+    """Raise ValueError unless the baseline was run at the same scale and format mix"""
+    for key, value in (("rows_per_file", rows_per_file), ("mix", mix)):
+        if baseline.get(key) != value:
+            raise ValueError(f"Baseline {key} {baseline.get(key)!r} does not match this run's {value!r}")
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare phase throughput against a saved baseline
+
+    Returns:
+        list: Phases whose rows/s dropped by more than tolerance
+
+    Raises:
+        ValueError: If the baseline was run with a different scale or format mix
+    """
+    check_baseline(baseline, results["rows_per_file"], results["mix"])
+    baseline_phases = {phase["phase"]: phase for phase in baseline["phases"]}
+    regressions = []
+    for phase in results["phases"]:
+        before = baseline_phases.get(phase["phase"])
+        if not before or not before["rows_per_s"] or not phase["rows_per_s"]:
+            continue
+        ratio = phase["rows_per_s"] / before["rows_per_s"]
+        flag = "REGRESSION" if ratio < 1 - tolerance else ""
+        print(f"{phase['phase']:<18} {ratio:>6.2f}x rows/s vs baseline {flag}")
+        if flag:
+            regressions.append(phase["phase"])
+    return regressions
+
+
+def parse_mix(text):
+    """Parse a format mix such as "csv=3,json=3,xml=3" """
+    mix = {}
+    for item in text.split(","):
+        extension, count = item.split("=")
+        mix[extension.strip()] = int(count)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the etl_code pipeline phases on synthetic data")
+    parser.add_argument("--rows", type=int, default=100000, help="records per generated file")
+    parser.add_argument("--mix", type=parse_mix, default="csv=3,json=3,xml=3", help="files per format")
+    parser.add_argument("--phases", default=",".join(PHASES), help="comma-separated phases to measure")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per phase, fastest is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare rows/s against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed rows/s drop before flagging")
+    args = parser.parse_args()
+    phases = args.phases.split(",")
+    unknown = [phase for phase in phases if phase not in PHASES]
+    if unknown:
+        parser.error(f"unknown phases {', '.join(unknown)}; expected some of {', '.join(PHASES)}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        try:
+            check_baseline(baseline, args.rows, args.mix)
+        except ValueError as e:
+            parser.error(str(e))
+
+    results = run_benchmark(args.rows, args.mix, phases, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+    if args.compare:
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,96 +1,557 @@
+import argparse
+import atexit
 import glob 
+import hashlib
+import json
+import os
+import resource
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import numpy as np
 import pandas as pd 
 import xml.etree.ElementTree as ET 
-from datetime import datetime 
+from datetime import datetime, date 
+
+try:
+    import orjson # optional faster json decoder
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 log_file = "log_file.txt" 
 target_file = "transformed_data.csv" 
+extract_workers = 1 # number of processes used to parse source files in parallel
+incremental = False # only process new or changed source files, tracked in the manifest
+manifest_file = "manifest.json" 
+output_format = "csv" # "csv", or a columnar "parquet" / "arrow" dataset written batch by batch
+target_dir = "transformed_data" # root directory of the columnar dataset
+partition_by = "source_file" # columnar partition key: "source_file" or "run_date"
+stream_csv = False # write the csv batch by batch instead of building the full data frame
+
+# Declared column types, applied by every reader at parse time so the
+# measures are contiguous float arrays instead of boxed object columns
+schema = {"name": "string", "height": "float64", "weight": "float64"}
+columns = list(schema)
+batch_size = 50000 # maximum number of rows held in one extracted batch
+
+def empty_frame():
+    '''Return an empty data frame with the declared schema '''
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in schema.items()})
+
+def make_frame(names, heights, weights):
+    '''Build a typed data frame from parsed column arrays '''
+    return pd.DataFrame({"name": pd.array(names, dtype=schema["name"]),
+                         "height": np.asarray(heights, dtype=schema["height"]),
+                         "weight": np.asarray(weights, dtype=schema["weight"])})
 
 def extract_from_csv(file_to_process):
-    dataframe = pd.read_csv(file_to_process)
+    dataframe = pd.read_csv(file_to_process, dtype=schema)
     return dataframe
 
 def extract_from_json(file_to_process):
-    dataframe = pd.read_json(file_to_process,lines = True)
+    dataframe = pd.read_json(file_to_process,lines = True, dtype=schema)
     return dataframe
 
 def extract_from_xml(file_to_process):
-    dataframe = pd.DataFrame(columns=["name","height","weight"])
+    rows = [] 
     tree = ET.parse(file_to_process)
     root = tree.getroot()
     for person in root:
         name = person.find("name").text
         height = float(person.find("height").text)
         weight = float(person.find("weight").text)
-        dataframe = pd.concat([dataframe,pd.DataFrame([{"name": name, "height": height, "weight": weight}])], ignore_index=True)
+        rows.append((name, height, weight))
+    dataframe = pd.DataFrame(rows, columns=columns).astype(schema)
     return dataframe
 
-def extract():
-    extracted_data = pd.DataFrame(columns=['name','height','weight']) # create an empty data frame to hold extracted data 
-    
-    # process all csv files, except the target file
-    for csvfile in glob.glob("source/*.csv"): 
-        extracted_data = pd.concat([extracted_data, pd.DataFrame(extract_from_csv(csvfile))], ignore_index=True) 
-        
-    # process all json files 
-    for jsonfile in glob.glob("source/*.json"): 
-        extracted_data = pd.concat([extracted_data, pd.DataFrame(extract_from_json(jsonfile))], ignore_index=True) 
+def iter_csv_batches(file_to_process, batch_size=batch_size):
+    '''Yield the rows of a csv file as data frames of at most batch_size rows'''
+    for chunk in pd.read_csv(file_to_process, chunksize=batch_size, usecols=columns, dtype=schema):
+        yield chunk
+
+def decode_json_lines(lines):
+    '''Decode a batch of json lines in a single decoder call and return typed columns '''
+    records = json_loads(b"[" + b",".join(lines) + b"]")
+    return make_frame([record.get("name") for record in records],
+                      [record.get("height") for record in records],
+                      [record.get("weight") for record in records])
+
+def iter_json_batches(file_to_process, batch_size=batch_size):
+    '''Yield the records of a json-lines file as data frames of at most
+    batch_size rows. Lines are read lazily and each batch is decoded with
+    orjson when installed, with the schema dtypes applied instead of inferred '''
+    lines = []
+    with open(file_to_process, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            lines.append(line)
+            if len(lines) == batch_size:
+                yield decode_json_lines(lines)
+                lines = []
+    if lines:
+        yield decode_json_lines(lines)
+
+def iter_xml_batches(file_to_process, batch_size=batch_size):
+    '''Yield the <person> records of an xml file as data frames of at most
+    batch_size rows. The file is read incrementally with iterparse and every
+    element is cleared once consumed, so memory stays flat for any file size '''
+    names, heights, weights = [], array("d"), array("d")
+    context = ET.iterparse(file_to_process, events=("start", "end"))
+    _, root = next(context)
+    for event, element in context:
+        if event != "end" or element.tag != "person":
+            continue
+        names.append(element.findtext("name"))
+        heights.append(float(element.findtext("height")))
+        weights.append(float(element.findtext("weight")))
+        element.clear()
+        root.clear() # drop the references the root keeps to finished elements
+        if len(names) == batch_size:
+            yield make_frame(names, heights, weights)
+            names, heights, weights = [], array("d"), array("d")
+    if names:
+        yield make_frame(names, heights, weights)
+
+def iter_xml_tree_batches(file_to_process, batch_size=batch_size):
+    '''Yield the rows of extract_from_xml(), which loads the whole tree at once '''
+    dataframe = extract_from_xml(file_to_process)
+    for start in range(0, len(dataframe), batch_size):
+        yield dataframe.iloc[start:start + batch_size]
+
+xml_readers = {"iterparse": iter_xml_batches, "tree": iter_xml_tree_batches}
+
+def list_source_files(source_dir="source"):
+    '''Return (file, extension) pairs in the csv, json, xml glob order
+    that extract() has always used '''
+    return [(file_to_process, extension) for extension in ("csv", "json", "xml")
+            for file_to_process in glob.glob(f"{source_dir}/*.{extension}")]
+
+def iter_file_batches(file_to_process, extension, batch_size=batch_size, xml_reader="iterparse"):
+    '''Stream one source file as bounded-size data frames '''
+    readers = {"csv": iter_csv_batches, "json": iter_json_batches, "xml": xml_readers[xml_reader]}
+    for batch in readers[extension](file_to_process, batch_size):
+        yield batch[columns]
+
+def iter_source_batches(source_dir="source", batch_size=batch_size, xml_reader="iterparse"):
+    '''Stream every source file as (file, data frame) pairs of bounded size '''
+    for file_to_process, extension in list_source_files(source_dir):
+        for batch in iter_file_batches(file_to_process, extension, batch_size, xml_reader):
+            yield file_to_process, batch
 
-    # process all xml files 
-    for xmlfile in glob.glob("source/*.xml"): 
-        extracted_data = pd.concat([extracted_data, pd.DataFrame(extract_from_xml(xmlfile))], ignore_index=True) 
+def iter_batches(source_dir="source", batch_size=batch_size, xml_reader="iterparse"):
+    '''Stream every source file as bounded-size data frames '''
+    for _, batch in iter_source_batches(source_dir, batch_size, xml_reader):
+        yield batch
 
-    return extracted_data    
+def extract_file(file_to_process, extension, batch_size=batch_size, xml_reader="iterparse"):
+    '''Extract one source file. Returns the data frame and the seconds it took '''
+    start = time.perf_counter()
+    batches = list(iter_file_batches(file_to_process, extension, batch_size, xml_reader))
+    dataframe = pd.concat(batches, ignore_index=True) if batches else empty_frame()
+    return dataframe, time.perf_counter() - start
+
+def extract(source_dir="source", batch_size=batch_size, xml_reader="iterparse", workers=1):
+    '''Collect all streamed batches and assemble the extracted data frame once.
+    xml_reader selects the xml parser: "iterparse" (incremental) or "tree".
+    With workers > 1 the files are parsed in a process pool; results are merged
+    in glob order so the output is identical to a serial run '''
+    if workers <= 1:
+        batches = list(iter_batches(source_dir, batch_size, xml_reader))
+        if not batches:
+            return empty_frame()
+        return pd.concat(batches, ignore_index=True)
+
+    source_files = list_source_files(source_dir)
+    if not source_files:
+        return empty_frame()
+    files, extensions = zip(*source_files)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(extract_file, files, extensions,
+                                    [batch_size] * len(files), [xml_reader] * len(files)))
+    for file_to_process, (dataframe, seconds) in zip(files, results):
+        log_progress("File extracted", file=file_to_process, rows=len(dataframe), wall_s=round(seconds, 6))
+    return pd.concat([dataframe for dataframe, _ in results], ignore_index=True)
+
+def convert_units(data, column, factor):
+    '''Multiply a numeric column by factor and round to two decimals, working
+    in place on a single contiguous copy of the column '''
+    values = data[column].to_numpy(copy=True)
+    np.multiply(values, factor, out=values)
+    np.round(values, 2, out=values)
+    data[column] = values
 
 def transform(data):
     '''Convert inches to meters and round off to two decimals 
     1 inch is 0.0254 meters '''
-    data['height'] = round(data.height * 0.0254,2) 
+    convert_units(data, "height", 0.0254)
 
     '''Convert pounds to kilograms and round off to two decimals 
     1 pound is 0.45359237 kilograms '''
-    data['weight'] = round(data.weight * 0.45359237,2) 
+    convert_units(data, "weight", 0.45359237)
     
     return data  
 
 def load_data(target_file, transformed_data):
     transformed_data.to_csv(target_file)
 
+def load_data_batches(target_file, batches):
+    '''Transform and append each streamed batch to the target file so the
+    full data frame is never assembled. Returns the number of rows written '''
+    rows_written = 0
+    for batch in batches:
+        batch = batch.set_axis(range(rows_written, rows_written + len(batch)))
+        transform(batch).to_csv(target_file, mode="w" if rows_written == 0 else "a", header=rows_written == 0)
+        rows_written += len(batch)
+    return rows_written
+
+def load_data_columnar(target_dir, source_batches, output_format="parquet", partition_by="source_file", compression="zstd"):
+    '''Transform each streamed (file, batch) pair and write it to a compressed
+    columnar dataset under target_dir, one hive-style directory per partition
+    (e.g. source_file=source1.csv/ or run_date=2025-07-17/), so readers can
+    project columns and skip partitions. Every batch becomes one row group
+    (parquet) or record batch (arrow). Returns the number of rows written '''
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is required for the columnar sink: pip install pyarrow")
+
+    writers = {}
+    rows_written = 0
+    try:
+        for file_to_process, batch in source_batches:
+            if partition_by == "source_file":
+                partition = os.path.basename(file_to_process)
+            else:
+                partition = date.today().isoformat()
+            table = pa.Table.from_pandas(transform(batch), preserve_index=False)
+            if partition not in writers:
+                partition_dir = os.path.join(target_dir, f"{partition_by}={partition}")
+                os.makedirs(partition_dir, exist_ok=True)
+                if output_format == "parquet":
+                    writers[partition] = pq.ParquetWriter(os.path.join(partition_dir, "part-0.parquet"),
+                                                          table.schema, compression=compression)
+                else:
+                    writers[partition] = pa.ipc.new_file(os.path.join(partition_dir, "part-0.arrow"), table.schema,
+                                                         options=pa.ipc.IpcWriteOptions(compression=compression))
+            writers[partition].write_table(table)
+            rows_written += len(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return rows_written
+
+
+def file_fingerprint(file_to_process):
+    '''Return the size, mtime and sha256 content hash of a source file '''
+    digest = hashlib.sha256()
+    with open(file_to_process, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    stat = os.stat(file_to_process)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": digest.hexdigest()}
+
+def load_manifest(manifest_file):
+    '''Read the processed-file manifest, or start an empty one '''
+    if not os.path.exists(manifest_file):
+        return {"files": {}, "rows": 0}
+    with open(manifest_file) as f:
+        return json.load(f)
+
+def save_manifest(manifest_file, manifest):
+    '''Write the manifest atomically so an interrupted run never leaves it half written '''
+    with open(manifest_file + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_file + ".tmp", manifest_file)
+
+def find_changed_files(source_files, manifest):
+    '''Split the source files into those that are new or changed since the
+    manifest was written and the manifest entries that are no longer valid.
+    Files whose size and mtime are unchanged are not re-hashed '''
+    changed, fingerprints = [], {}
+    for file_to_process, extension in source_files:
+        entry = manifest["files"].get(file_to_process)
+        stat = os.stat(file_to_process)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            continue
+        fingerprint = file_fingerprint(file_to_process)
+        if entry and entry["sha256"] == fingerprint["sha256"]:
+            entry["mtime"] = fingerprint["mtime"] # touched but not modified
+            continue
+        changed.append((file_to_process, extension))
+        fingerprints[file_to_process] = fingerprint
+    on_disk = {file_to_process for file_to_process, _ in source_files}
+    stale = {file_to_process for file_to_process in manifest["files"]
+             if file_to_process not in on_disk or file_to_process in fingerprints}
+    return changed, fingerprints, stale
+
+def run_incremental(source_dir="source", target_file=target_file, manifest_file=manifest_file,
+                    batch_size=batch_size, xml_reader="iterparse"):
+    '''Extract and transform only the source files that are new or changed
+    since the last run and merge them into the target file. The target keeps a
+    source_file column so rows of a changed or removed file can be replaced.
+    Returns the number of new rows written '''
+    manifest = load_manifest(manifest_file)
+    if not os.path.exists(target_file):
+        manifest = {"files": {}, "rows": 0}
+    changed, fingerprints, stale = find_changed_files(list_source_files(source_dir), manifest)
+
+    new_frames = []
+    for file_to_process, extension in changed:
+        dataframe, seconds = extract_file(file_to_process, extension, batch_size, xml_reader)
+        dataframe["source_file"] = file_to_process
+        fingerprints[file_to_process]["rows"] = len(dataframe)
+        new_frames.append(dataframe)
+        log_progress("File extracted", file=file_to_process, rows=len(dataframe), wall_s=round(seconds, 6))
+    new_data = pd.concat(new_frames, ignore_index=True) if new_frames else empty_frame().assign(source_file=pd.Series(dtype="string"))
+    new_data = transform(new_data)
+
+    if not manifest["files"]:
+        new_data.to_csv(target_file)
+    elif stale:
+        # rows of changed or removed files have to be dropped, so rewrite the target
+        existing = pd.read_csv(target_file, index_col=0)
+        existing = existing[~existing["source_file"].isin(stale)]
+        merged = pd.concat([existing, new_data], ignore_index=True)
+        merged.to_csv(target_file)
+        manifest["rows"] = len(merged) - len(new_data)
+    elif len(new_data):
+        # only new files: append after the rows already in the target
+        new_data.index = range(manifest["rows"], manifest["rows"] + len(new_data))
+        new_data.to_csv(target_file, mode="a", header=False)
+
+    for file_to_process in stale:
+        manifest["files"].pop(file_to_process, None)
+    manifest["files"].update(fingerprints)
+    manifest["rows"] += len(new_data)
+    save_manifest(manifest_file, manifest)
+    log_progress("Incremental run", changed_files=len(changed), replaced_files=len(stale), rows_out=len(new_data))
+    return len(new_data)
+
+
+def reset_peak_rss():
+    '''Reset the resident set size high-water mark of this process (Linux
+    /proc/self/clear_refs). Returns False where it cannot be reset, in which
+    case peak_rss_mb() keeps reporting the peak of the whole process '''
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    '''Peak resident set size in MB since the last reset_peak_rss(), or since
+    the process started where the high-water mark cannot be reset '''
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / (1 << 10) # KB
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10) # bytes on macOS, KB elsewhere
+
+def cpu_seconds():
+    '''CPU time used by this process and its finished children, e.g. extract workers '''
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+class PhaseTracker:
+    '''Records wall time, CPU time, rows in/out, bytes read and peak memory per
+    pipeline phase and writes them, together with plain progress messages, as
+    one JSON object per line through a single buffered writer '''
+
+    def __init__(self, log_file):
+        self.writer = open(log_file, "a", buffering=1 << 16)
+
+    def write(self, record):
+        record = {"timestamp": datetime.now().isoformat(timespec="milliseconds"), **record}
+        self.writer.write(json.dumps(record) + "\n")
+
+    def log(self, message, **fields):
+        self.write({"message": message, **fields})
+
+    @contextmanager
+    def phase(self, name, rows_in=None, bytes_read=None):
+        '''Measure the enclosed block. The caller can set "rows_out" (and
+        "rows_in" or "bytes_read" once known) on the yielded metrics dict '''
+        metrics = {"phase": name, "rows_in": rows_in, "rows_out": None, "bytes_read": bytes_read}
+        # Per-phase peak where the high-water mark can be reset; otherwise the
+        # process peak is reported as such, with its value at phase start
+        per_phase_peak = reset_peak_rss()
+        if not per_phase_peak:
+            metrics["process_peak_rss_start_mb"] = round(peak_rss_mb(), 1)
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        status = "ok"
+        try:
+            yield metrics
+        except BaseException:
+            status = "failed"
+            raise
+        finally:
+            metrics["wall_s"] = round(time.perf_counter() - wall_start, 6)
+            metrics["cpu_s"] = round(cpu_seconds() - cpu_start, 6)
+            metrics["peak_rss_mb" if per_phase_peak else "process_peak_rss_mb"] = round(peak_rss_mb(), 1)
+            metrics["status"] = status
+            self.write(metrics)
+            self.flush()
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        if not self.writer.closed:
+            self.writer.close()
+
+trackers = {} # open phase trackers by log file, kept across runs in a warm process
+active_tracker = None # tracker of the run in progress, used by log_progress()
+
+def get_tracker(path=None):
+    '''Return the phase tracker writing to path (default log_file), creating it on first use '''
+    path = path or log_file
+    if path not in trackers:
+        trackers[path] = PhaseTracker(path)
+        atexit.register(trackers[path].close)
+    return trackers[path]
+
+def log_progress(message, **fields): 
+    (active_tracker or get_tracker()).log(message, **fields)
+
+def source_bytes(source_dir="source"):
+    '''Total size of the source files that extract() will read '''
+    return sum(os.path.getsize(file_to_process) for file_to_process, _ in list_source_files(source_dir))
+
+def default_options():
+    '''Return the run options, initialised from the module configuration '''
+    return {
+        "workers": extract_workers,
+        "incremental": incremental,
+        "manifest_file": manifest_file,
+        "output_format": output_format,
+        "partition_by": partition_by,
+        "batch_size": batch_size,
+        "stream_csv": stream_csv,
+        "xml_reader": "iterparse",
+        "log_file": log_file,
+        "print_result": False,
+    }
+
+def check_options(options):
+    '''Raise ValueError for option combinations that run() cannot honour:
+    the incremental mode extracts file by file in this process and merges
+    into a csv target '''
+    if options["incremental"]:
+        if options["output_format"] != "csv":
+            raise ValueError("incremental runs only write csv, not " + options["output_format"])
+        if options["workers"] != 1:
+            raise ValueError("incremental runs extract in a single process, workers must be 1")
+        if options["stream_csv"]:
+            raise ValueError("incremental runs merge into the existing csv and cannot stream it")
+
+def run(source_dir="source", target=target_file, options=None):
+    '''Run one ETL job from source_dir into target (a csv file, or the dataset
+    directory for a columnar output_format). options overrides any key of
+    default_options(). Keeps no state between calls apart from open log
+    writers, so a long-lived worker can call it for many jobs.
+    Returns the list of per-phase metrics '''
+    global active_tracker
+    options = {**default_options(), **(options or {})}
+    check_options(options)
+    tracker = get_tracker(options["log_file"])
+    previous_tracker, active_tracker = active_tracker, tracker
+    phases = []
+    try:
+        tracker.log("ETL Job Started", source_dir=source_dir, target=target)
+
+        if options["incremental"]:
+            # Extract, transform and load only the new or changed source files
+            with tracker.phase("incremental") as metrics:
+                metrics["rows_out"] = run_incremental(source_dir, target, options["manifest_file"],
+                                                      options["batch_size"], options["xml_reader"])
+            phases.append(metrics)
+        elif options["output_format"] == "csv" and options["stream_csv"]:
+            # Stream extract and transform straight into the csv file
+            with tracker.phase("extract_transform_load", bytes_read=source_bytes(source_dir)) as metrics:
+                batches = iter_batches(source_dir, options["batch_size"], options["xml_reader"])
+                metrics["rows_out"] = load_data_batches(target, batches)
+            phases.append(metrics)
+        elif options["output_format"] != "csv":
+            # Stream extract and transform straight into the columnar dataset
+            with tracker.phase("extract_transform_load", bytes_read=source_bytes(source_dir)) as metrics:
+                source_batches = iter_source_batches(source_dir, options["batch_size"], options["xml_reader"])
+                metrics["rows_out"] = load_data_columnar(target, source_batches, options["output_format"], options["partition_by"])
+            phases.append(metrics)
+        else:
+            with tracker.phase("extract", bytes_read=source_bytes(source_dir)) as metrics:
+                extracted_data = extract(source_dir, options["batch_size"], options["xml_reader"], options["workers"])
+                metrics["rows_out"] = len(extracted_data)
+            phases.append(metrics)
+
+            with tracker.phase("transform", rows_in=len(extracted_data)) as metrics:
+                transformed_data = transform(extracted_data)
+                metrics["rows_out"] = len(transformed_data)
+            phases.append(metrics)
+            if options["print_result"]:
+                print("Transformed Data")
+                print(transformed_data)
+
+            with tracker.phase("load", rows_in=len(transformed_data)) as metrics:
+                load_data(target,transformed_data)
+                metrics["rows_out"] = len(transformed_data)
+            phases.append(metrics)
+
+        tracker.log("ETL Job Ended")
+        tracker.flush()
+    finally:
+        active_tracker = previous_tracker
+    return phases
+
+def main(argv=None):
+    '''Command line entry point '''
+    defaults = default_options()
+    parser = argparse.ArgumentParser(description="Extract name/height/weight records from csv, json and xml files, convert them to metric units and load the result")
+    parser.add_argument("--source", default="source", help="directory holding the source files")
+    parser.add_argument("--target", help=f"output csv file, or dataset directory for columnar formats (default {target_file} / {target_dir})")
+    parser.add_argument("--workers", type=int, default=defaults["workers"], help="processes used to parse source files")
+    parser.add_argument("--incremental", action="store_true", default=defaults["incremental"], help="only process new or changed source files")
+    parser.add_argument("--manifest", default=defaults["manifest_file"], help="processed-file manifest used by --incremental")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default=defaults["output_format"])
+    parser.add_argument("--partition-by", choices=["source_file", "run_date"], default=defaults["partition_by"])
+    parser.add_argument("--batch-size", type=int, default=defaults["batch_size"])
+    parser.add_argument("--stream", action="store_true", default=defaults["stream_csv"], help="write the csv batch by batch without building the full data frame")
+    parser.add_argument("--xml-reader", choices=list(xml_readers), default=defaults["xml_reader"])
+    parser.add_argument("--log-file", default=defaults["log_file"])
+    parser.add_argument("--quiet", action="store_true", help="do not print the transformed data")
+    args = parser.parse_args(argv)
+
+    options = {
+        "workers": args.workers,
+        "incremental": args.incremental,
+        "manifest_file": args.manifest,
+        "output_format": args.format,
+        "partition_by": args.partition_by,
+        "batch_size": args.batch_size,
+        "stream_csv": args.stream,
+        "xml_reader": args.xml_reader,
+        "log_file": args.log_file,
+        "print_result": not args.quiet,
+    }
+    try:
+        check_options(options)
+    except ValueError as e:
+        parser.error(str(e))
+
+    target = args.target or (target_file if args.format == "csv" else target_dir)
+    run(args.source, target, options)
 
-def log_progress(message): 
-    timestamp_format = '%Y-%h-%d-%H:%M:%S' # Year-Monthname-Day-Hour-Minute-Second 
-    now = datetime.now() # get current timestamp 
-    timestamp = now.strftime(timestamp_format) 
-    with open(log_file,"a") as f: 
-        f.write(timestamp + ',' + message + '\n') 
-
-
-# Log the initialization of the ETL process 
-log_progress("ETL Job Started") 
- 
-# Log the beginning of the Extraction process 
-log_progress("Extract phase Started") 
-extracted_data = extract() 
- 
-# Log the completion of the Extraction process 
-log_progress("Extract phase Ended") 
- 
-# Log the beginning of the Transformation process 
-log_progress("Transform phase Started") 
-transformed_data = transform(extracted_data) 
-print("Transformed Data") 
-print(transformed_data) 
- 
-# Log the completion of the Transformation process 
-log_progress("Transform phase Ended") 
- 
-# Log the beginning of the Loading process 
-log_progress("Load phase Started") 
-load_data(target_file,transformed_data) 
- 
-# Log the completion of the Loading process 
-log_progress("Load phase Ended") 
- 
-# Log the completion of the ETL process 
-log_progress("ETL Job Ended") 
 
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,56 @@
 # Cleaned ETL operations on Country-GDP data
 
-from bs4 import BeautifulSoup
 import requests
+import argparse
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from urllib.parse import urlparse
 import pandas as pd
-import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import sqlite_pool
+from common.numeric import parse_numeric
+from common.wikitable import extract_table
 
 # Configuration
 url = 'https://web.archive.org/web/20230902185326/https://en.wikipedia.org/wiki/List_of_countries_by_GDP_%28nominal%29'
 table_attribs = ["Country", "GDP_USD_millions"]
 db_name = 'World_Economies.db'
 table_name = 'Countries_by_GDP'
+history_table_name = 'Countries_by_GDP_history'
+# Lower bounds of the bucketed GDP totals, in USD billions
+gdp_buckets = [0, 1, 10, 100, 1000]
 csv_path = './Countries_by_GDP.csv'
+# Header cells: Country/Territory, UN region, IMF[1] (Estimate, Year), World Bank, United Nations
+table_spec = {
+    'classes': ('wikitable', 'sortable'),
+    'columns': [('Country', table_attribs[0], 'string'),
+                ('IMF', table_attribs[1], 'float64')],
+}
 
 def extract(url, table_attribs):
     """Extract GDP data from Wikipedia table."""
     response = requests.get(url).text 
-    soup = BeautifulSoup(response, 'html.parser')
-    
-    # Find table with both 'wikitable' and 'sortable' classes
-    tables = soup.find_all('table')
-    table = None
-    for t in tables:
-        classes = t.get('class', [])
-        if 'wikitable' in classes and 'sortable' in classes:
-            table = t
-            break
-    
-    if table is None:
-        raise ValueError("Could not find a table with both 'wikitable' and 'sortable' classes")
-    
-    # Extract and select relevant columns
-    df = pd.read_html(str(table))[0]
-    if len(df.columns) >= 8:
-        df = df.iloc[:, [0, 2]]  # Country and IMF GDP estimate
-        df.columns = table_attribs
-        
-        # Remove header row if it exists
-        if df.iloc[0, 0] in ['Country/Territory', 'Country']:
-            df = df.iloc[1:].reset_index(drop=True)
-    
+    return parse_gdp_table(response, table_attribs)
+
+def parse_gdp_table(response, table_attribs, spec=None):
+    """Parse the Country and IMF GDP estimate columns out of a downloaded page."""
+    df = extract_table(response, spec or table_spec)
+    df.columns = table_attribs
     return df
 
 def transform(df):
     """Clean and transform GDP data from millions to billions USD."""
-    # Clean GDP data: remove commas, dashes, and convert to numeric
-    df['GDP_USD_millions'] = (df['GDP_USD_millions']
-                            .astype(str)
-                            .str.replace(',', '')
-                            .str.replace('—', '')
-                            .str.replace('–', '')
-                            .str.strip())
-    
-    # Convert to numeric, invalid values become NaN
-    df['GDP_USD_millions'] = pd.to_numeric(df['GDP_USD_millions'], errors='coerce')
+    # Clean GDP data: strip commas, dashes, footnotes and whitespace and
+    # convert to numeric in one pass; invalid values are flagged
+    gdp, invalid = parse_numeric(df['GDP_USD_millions'])
     
     # Remove rows with missing GDP data
-    df = df.dropna(subset=['GDP_USD_millions']).reset_index(drop=True)
+    df = df.assign(GDP_USD_millions=gdp)[~invalid].reset_index(drop=True)
     
     # Convert from millions to billions and round to 2 decimal places
     df['GDP_USD_millions'] = (df['GDP_USD_millions'] / 1000).round(2)
@@ -67,15 +62,82 @@ def load_to_csv(df, csv_path):
     df.to_csv(csv_path, index=False)
 
 def load_to_db(df, sql_connection, table_name):
-    """Save dataframe to database table."""
-    df.to_sql(table_name, sql_connection, if_exists='replace', index=False)
+    """Save dataframe to database table and refresh its summary tables
+    in the same transaction."""
+    rows = list(df[['Country', 'GDP_USD_millions']].itertuples(index=False, name=None))
+    with sql_connection:
+        # sqlite3 only opens a transaction implicitly before DML, so begin
+        # explicitly to keep the DROP/CREATE from autocommitting
+        if not sql_connection.in_transaction:
+            sql_connection.execute('BEGIN')
+        sql_connection.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        sql_connection.execute(f'CREATE TABLE "{table_name}" (Country TEXT, GDP_USD_millions REAL)')
+        sql_connection.executemany(f'INSERT INTO "{table_name}" (Country, GDP_USD_millions) VALUES (?, ?)', rows)
+        refresh_summaries(sql_connection, table_name)
+
+def refresh_summaries(sql_connection, table_name, buckets=None):
+    """Rebuild the precomputed summaries of a GDP table. Runs inside the
+    caller's transaction, so readers see the table and its summaries
+    change together.
+
+    <table>_rank     countries by descending GDP with their rank and the
+                     running GDP total, indexed for top-N and threshold lookups
+    <table>_buckets  country count and GDP total per GDP range
+    <table>_summary  one row with the row count and the overall GDP total"""
+    bounds = sorted(buckets or gdp_buckets)
+    ranges = [(lower, upper) for lower, upper in zip(bounds, bounds[1:] + [None])]
+    for suffix in ('rank', 'buckets', 'summary'):
+        sql_connection.execute(f'DROP TABLE IF EXISTS "{table_name}_{suffix}"')
+
+    sql_connection.execute(f'CREATE TABLE "{table_name}_rank" ('
+                           'Rank INTEGER PRIMARY KEY, Country TEXT, GDP_USD_millions REAL, Cumulative_GDP REAL)')
+    sql_connection.execute(f'INSERT INTO "{table_name}_rank" '
+                           'SELECT ROW_NUMBER() OVER w, Country, GDP_USD_millions, '
+                           'SUM(GDP_USD_millions) OVER (w ROWS UNBOUNDED PRECEDING) '
+                           f'FROM "{table_name}" WHERE GDP_USD_millions IS NOT NULL '
+                           'WINDOW w AS (ORDER BY GDP_USD_millions DESC, Country)')
+    sql_connection.execute(f'CREATE INDEX "{table_name}_rank_gdp" ON "{table_name}_rank" (GDP_USD_millions, Rank DESC)')
+
+    sql_connection.execute(f'CREATE TABLE "{table_name}_buckets" ('
+                           'Lower REAL PRIMARY KEY, Upper REAL, Countries INTEGER, GDP_Total REAL)')
+    values = ', '.join(['(?, ?)'] * len(ranges))
+    sql_connection.execute(f'WITH bounds(Lower, Upper) AS (VALUES {values}) '
+                           f'INSERT INTO "{table_name}_buckets" '
+                           'SELECT b.Lower, b.Upper, COUNT(t.Country), COALESCE(SUM(t.GDP_USD_millions), 0) '
+                           f'FROM bounds b LEFT JOIN "{table_name}" t ON t.GDP_USD_millions >= b.Lower '
+                           'AND (b.Upper IS NULL OR t.GDP_USD_millions < b.Upper) GROUP BY b.Lower',
+                           [bound for pair in ranges for bound in pair])
+
+    sql_connection.execute(f'CREATE TABLE "{table_name}_summary" (Row_Count INTEGER, GDP_Total REAL)')
+    sql_connection.execute(f'INSERT INTO "{table_name}_summary" '
+                           f'SELECT COUNT(*), COALESCE(SUM(GDP_USD_millions), 0) FROM "{table_name}"')
+
+def top_countries(sql_connection, n, table_name=table_name):
+    """Return the n largest economies as (Rank, Country, GDP) rows,
+    read by primary key from the rank summary."""
+    return sql_connection.execute(f'SELECT Rank, Country, GDP_USD_millions FROM "{table_name}_rank" '
+                                  'WHERE Rank <= ? ORDER BY Rank', (n,)).fetchall()
+
+def countries_above(sql_connection, threshold, table_name=table_name):
+    """Return (count, GDP total) of the countries with GDP above threshold
+    (USD billions) with one index probe into the rank summary."""
+    row = sql_connection.execute(f'SELECT Rank, Cumulative_GDP FROM "{table_name}_rank" '
+                                 'WHERE GDP_USD_millions > ? ORDER BY GDP_USD_millions, Rank DESC LIMIT 1',
+                                 (threshold,)).fetchone()
+    return row if row else (0, 0.0)
+
+def country_count(sql_connection, table_name=table_name):
+    """Return the number of rows in the GDP table from its summary."""
+    return sql_connection.execute(f'SELECT Row_Count FROM "{table_name}_summary"').fetchone()[0]
+
+def gdp_buckets_summary(sql_connection, table_name=table_name):
+    """Return (Lower, Upper, Countries, GDP_Total) per GDP range."""
+    return sql_connection.execute(f'SELECT Lower, Upper, Countries, GDP_Total FROM "{table_name}_buckets" '
+                                  'ORDER BY Lower').fetchall()
 
 def run_query(query_statement, sql_connection):
-    """Execute query and print results."""
-    cursor = sql_connection.cursor()
-    cursor.execute(query_statement)
-    result = cursor.fetchall()
-    for row in result:
+    """Execute query and print results, streaming the rows in batches."""
+    for row in sqlite_pool.iter_rows(sql_connection, query_statement):
         print(row)
     sql_connection.commit()
 
@@ -84,6 +146,114 @@ def log_progress(message):
     with open('log.txt', 'a') as f:
         f.write(message + '\n')
 
+class RateLimiter:
+    """Spaces out requests so at most `rate` of them start per second."""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_time)
+            self.next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def snapshot_date(snapshot_url):
+    """Return the YYYY-MM-DD date of a web.archive.org snapshot URL."""
+    match = re.search(r'/web/(\d{4})(\d{2})(\d{2})\d*', snapshot_url)
+    if match is None:
+        raise ValueError(f"Not a web.archive.org snapshot URL: {snapshot_url}")
+    return '-'.join(match.groups())
+
+def fetch_snapshots(urls, max_per_host=4, requests_per_second=2.0, timeout=30):
+    """Download snapshot pages concurrently over one keep-alive session,
+    with at most max_per_host requests in flight and requests_per_second
+    started per host. Yields (url, html, error) as downloads complete;
+    html is None and error the exception when a download failed."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=max_per_host)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    hosts = {urlparse(snapshot_url).netloc for snapshot_url in urls}
+    limits = {host: (threading.BoundedSemaphore(max_per_host), RateLimiter(requests_per_second)) for host in hosts}
+
+    def fetch(snapshot_url):
+        semaphore, limiter = limits[urlparse(snapshot_url).netloc]
+        with semaphore:
+            limiter.wait()
+            response = session.get(snapshot_url, timeout=timeout)
+            response.raise_for_status()
+            return response.text
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_per_host * len(hosts))) as executor:
+            futures = {executor.submit(fetch, snapshot_url): snapshot_url for snapshot_url in urls}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except requests.exceptions.RequestException as e:
+                    yield futures[future], None, e
+    finally:
+        session.close()
+
+def parse_snapshot(snapshot_url, response, table_attribs):
+    """Parse and transform one snapshot page, tagged with its date."""
+    df = transform(parse_gdp_table(response, table_attribs))
+    df.insert(0, 'Snapshot_Date', snapshot_date(snapshot_url))
+    return df
+
+def extract_snapshots(urls, table_attribs, max_per_host=4, requests_per_second=2.0, parse_workers=None):
+    """Fetch many snapshots concurrently and parse them in a process pool
+    as they arrive. Snapshots that fail to download or parse are logged and
+    skipped. Returns one (Snapshot_Date, Country, GDP) data frame ordered by
+    snapshot date, and a dict of url -> error for the failed snapshots."""
+    frames, failed, futures = [], {}, {}
+    with ProcessPoolExecutor(max_workers=parse_workers) as executor:
+        for snapshot_url, response, error in fetch_snapshots(urls, max_per_host, requests_per_second):
+            if error is None:
+                futures[snapshot_url] = executor.submit(parse_snapshot, snapshot_url, response, table_attribs)
+            else:
+                failed[snapshot_url] = error
+        for snapshot_url, future in futures.items():
+            try:
+                frames.append(future.result())
+            except (KeyError, IndexError, ValueError) as e:
+                failed[snapshot_url] = e
+    for snapshot_url, error in failed.items():
+        log_progress(f'Skipping snapshot {snapshot_url}: {error}')
+    if not frames:
+        return pd.DataFrame(columns=['Snapshot_Date'] + table_attribs), failed
+    df = pd.concat(frames, ignore_index=True)
+    return df.sort_values('Snapshot_Date', kind='stable').reset_index(drop=True), failed
+
+def load_history_to_db(df, sql_connection, table_name):
+    """Save the snapshot history to a (Snapshot_Date, Country) keyed table
+    in a single transaction."""
+    rows = list(df[['Snapshot_Date', 'Country', 'GDP_USD_millions']].itertuples(index=False, name=None))
+    with sql_connection:
+        sql_connection.execute(f'CREATE TABLE IF NOT EXISTS "{table_name}" ('
+                               'Snapshot_Date TEXT NOT NULL, Country TEXT NOT NULL, GDP_USD_millions REAL, '
+                               'PRIMARY KEY (Snapshot_Date, Country))')
+        sql_connection.executemany(f'INSERT OR REPLACE INTO "{table_name}" '
+                                   '(Snapshot_Date, Country, GDP_USD_millions) VALUES (?, ?, ?)', rows)
+
+def main_history(urls_path, max_per_host=4, requests_per_second=2.0, parse_workers=None):
+    """Bulk ETL of many snapshots listed one URL per line in urls_path."""
+    with open(urls_path) as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    
+    df, failed = extract_snapshots(urls, table_attribs, max_per_host, requests_per_second, parse_workers)
+    log_progress(f'Data extracted and transformed from {len(urls) - len(failed)} snapshots, {len(failed)} failed')
+    
+    sql_connection = sqlite_pool.get_connection(db_name)
+    load_history_to_db(df, sql_connection, history_table_name)
+    log_progress(f'{len(df)} rows loaded to {history_table_name} successfully')
+    
+    sqlite_pool.close_all()
+
 def main():
     """Main ETL pipeline execution."""
     # Extract
@@ -99,17 +269,24 @@ def main():
     log_progress('Data loaded to CSV successfully')
     
     # Load to Database
-    sql_connection = sqlite3.connect(db_name)
+    sql_connection = sqlite_pool.get_connection(db_name)
     load_to_db(df, sql_connection, table_name)
     log_progress('Data loaded to database successfully')
     
     # Verify database load
-    query_statement = f"SELECT COUNT(*) FROM {table_name}"
-    print(f"Number of records in database: ", end="")
-    run_query(query_statement, sql_connection)
+    print(f"Number of records in database: {country_count(sql_connection)}")
     
-    sql_connection.close()
+    sqlite_pool.close_all()
     log_progress('All operations completed successfully')
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Extract GDP by country from archived Wikipedia pages')
+    parser.add_argument('--snapshots', help='file with one web.archive.org snapshot URL per line (bulk history mode)')
+    parser.add_argument('--max-per-host', type=int, default=4, help='concurrent requests per host')
+    parser.add_argument('--rate', type=float, default=2.0, help='requests started per second per host')
+    parser.add_argument('--workers', type=int, default=None, help='processes used to parse pages')
+    args = parser.parse_args()
+    if args.snapshots:
+        main_history(args.snapshots, args.max_per_host, args.rate, args.workers)
+    else:
+        main() 
\ No newline at end of file
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk multi-snapshot GDP extraction, run against a local
+stand-in for web.archive.org instead of the real site.
+
+    python -m pytest test_bulk_extract.py
+    python test_bulk_extract.py
+"""
+
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import etl_project_gdp as gdp
+
+COUNTRIES = ["United States", "China", "Germany"]
+
+
+def snapshot_page(year):
+    """A GDP page laid out like the archived Wikipedia list, with values that depend on the year"""
+    rows = "".join(
+        f"<tr><td><a href='#'>{country}</a></td><td>Region</td>"
+        f"<td>{(i + 1) * 1000000 + year:,}</td><td>{year}</td>"
+        f"<td>—</td><td>—</td><td>—</td><td>—</td></tr>"
+        for i, country in enumerate(COUNTRIES)
+    )
+    return f"""<html><body>
+    <table class="wikitable sortable static-row-numbers">
+    <tr><th rowspan="2">Country/Territory</th><th rowspan="2">UN region</th>
+        <th colspan="2">IMF[1]</th><th colspan="2">World Bank[13]</th><th colspan="2">United Nations[14]</th></tr>
+    <tr><th>Estimate</th><th>Year</th><th>Estimate</th><th>Year</th><th>Estimate</th><th>Year</th></tr>
+    {rows}
+    </table></body></html>"""
+
+
+class StandInArchive(BaseHTTPRequestHandler):
+    """Serves /web/<timestamp>/... (404 for 1999 snapshots) and records how many requests were in flight at once"""
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    started = []
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            cls.started.append(time.monotonic())
+        try:
+            time.sleep(0.05)
+            if self.path.startswith("/web/1999"):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = snapshot_page(int(self.path.split("/")[2][:4])).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    StandInArchive.in_flight = StandInArchive.max_in_flight = 0
+    StandInArchive.started = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInArchive)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def snapshot_urls(server, years):
+    host, port = server.server_address
+    return [f"http://{host}:{port}/web/{year}0601120000/https://en.wikipedia.org/wiki/List_of_countries_by_GDP_(nominal)"
+            for year in years]
+
+
+def test_snapshot_date():
+    assert gdp.snapshot_date(gdp.url) == "2023-09-02"
+
+
+def test_extract_snapshots_respects_host_limit():
+    server = start_server()
+    try:
+        years = range(2000, 2012)
+        df, failed = gdp.extract_snapshots(snapshot_urls(server, years), gdp.table_attribs,
+                                           max_per_host=3, requests_per_second=0, parse_workers=2)
+    finally:
+        server.shutdown()
+
+    assert StandInArchive.max_in_flight <= 3
+    assert StandInArchive.max_in_flight > 1
+    assert not failed
+    assert list(df.columns) == ["Snapshot_Date", "Country", "GDP_USD_millions"]
+    assert len(df) == len(years) * len(COUNTRIES)
+    assert df["Snapshot_Date"].is_monotonic_increasing
+    first = df[(df["Snapshot_Date"] == "2000-06-01") & (df["Country"] == "China")]
+    assert first["GDP_USD_millions"].iloc[0] == round((2000000 + 2000) / 1000, 2)
+
+
+def test_rate_limit_spaces_requests():
+    server = start_server()
+    try:
+        list(gdp.fetch_snapshots(snapshot_urls(server, range(2000, 2005)), max_per_host=5, requests_per_second=20))
+    finally:
+        server.shutdown()
+
+    started = sorted(StandInArchive.started)
+    assert started[-1] - started[0] >= 4 / 20 * 0.9
+
+
+def test_load_history_single_transaction():
+    server = start_server()
+    try:
+        df, _ = gdp.extract_snapshots(snapshot_urls(server, [2020, 2021]), gdp.table_attribs, requests_per_second=0)
+    finally:
+        server.shutdown()
+
+    conn = sqlite3.connect(":memory:")
+    gdp.load_history_to_db(df, conn, gdp.history_table_name)
+    gdp.load_history_to_db(df, conn, gdp.history_table_name)  # reloading replaces, never duplicates
+    count, = conn.execute(f"SELECT COUNT(*) FROM {gdp.history_table_name}").fetchone()
+    assert count == 2 * len(COUNTRIES)
+    assert not conn.in_transaction
+
+
+def test_missing_snapshot_is_skipped():
+    server = start_server()
+    skipped = []
+    log_progress, gdp.log_progress = gdp.log_progress, skipped.append  # keep log.txt untouched
+    try:
+        urls = snapshot_urls(server, [1999, 2020, 2021])
+        df, failed = gdp.extract_snapshots(urls, gdp.table_attribs, requests_per_second=0)
+    finally:
+        gdp.log_progress = log_progress
+        server.shutdown()
+
+    assert list(failed) == [urls[0]]
+    assert len(skipped) == 1 and urls[0] in skipped[0]
+    assert sorted(df["Snapshot_Date"].unique()) == ["2020-06-01", "2021-06-01"]
+    assert len(df) == 2 * len(COUNTRIES)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✅ {name}")
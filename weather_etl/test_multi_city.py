@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the multi-city weather extraction, run against a local stand-in
+for wttr.in that serves debug_weather.json instead of the real service.
+
+    python -m pytest test_multi_city.py
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+import weather_etl
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "debug_weather.json")) as f:
+    SAMPLE = json.load(f)
+
+CITIES = [f"city {i}" for i in range(24)]
+DELAY = 0.1
+
+
+def city_payload(city):
+    """The sample j1 payload with a current temperature that depends on the city"""
+    payload = copy.deepcopy(SAMPLE)
+    if city == "bad hourly":
+        payload["weather"][0]["hourly"][0]["tempC"] = ""
+        return payload
+    payload["current_condition"][0]["temp_C"] = str(len(city) + int(city.split()[-1]))
+    return payload
+
+
+class StandInWttr(BaseHTTPRequestHandler):
+    """Serves /<city>?format=j1, 404 for /missing and a blank hourly tempC
+    for /bad hourly, counting requests in flight and client connections
+    on self.server"""
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        stats = self.server
+        with stats.lock:
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            stats.connections.add(self.client_address)
+        try:
+            time.sleep(DELAY)
+            city = unquote(urlparse(self.path).path.strip("/"))
+            if city == "missing":
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = json.dumps(city_payload(city)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with stats.lock:
+                stats.in_flight -= 1
+
+
+@contextmanager
+def stand_in_wttr():
+    """Run a fresh stand-in server for one test and yield it with its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInWttr)
+    server.lock, server.in_flight, server.max_in_flight, server.connections = threading.Lock(), 0, 0, set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        host, port = server.server_address
+        yield server, f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_city_url_quotes_names():
+    assert weather_etl.city_url("new york", "http://localhost:1/") == "http://localhost:1/new%20york?format=j1"
+
+
+def test_fetch_is_concurrent_and_bounded():
+    with stand_in_wttr() as (server, base_url):
+        start = time.perf_counter()
+        records, failed = weather_etl.extract_transform_cities(CITIES, max_concurrent=8, base_url=base_url)
+        elapsed = time.perf_counter() - start
+
+    assert not failed
+    assert sorted(record["city"] for record in records) == sorted(CITIES)
+    assert 1 < server.max_in_flight <= 8
+    assert len(server.connections) <= 8  # connections are reused, not opened per request
+    assert elapsed < len(CITIES) * DELAY / 2  # far below the sequential sum
+    record = next(record for record in records if record["city"] == "city 3")
+    assert record["obs_tmp"] == len("city 3") + 3
+
+
+def test_failed_cities_are_reported():
+    with stand_in_wttr() as (_, base_url):
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = weather_etl.WeatherSink(None, None, os.path.join(tmp, "weather.db"), weather_etl.CITY_TABLE_NAME,
+                                           by_city=True, hourly_table_name=weather_etl.HOURLY_TABLE_NAME)
+            with sink:
+                records, failed = weather_etl.extract_transform_cities(["city 1", "missing", "bad hourly"],
+                                                                       base_url=base_url, sink=sink)
+            weather_etl.sqlite_pool.close_all()
+
+    assert [record["city"] for record in records] == ["city 1"]
+    assert sorted(failed) == ["bad hourly", "missing"]
+    assert sink.written == 1
+
+
+def test_load_cities_single_table_unique_per_day():
+    with stand_in_wttr() as (_, base_url):
+        records, _ = weather_etl.extract_transform_cities(CITIES[:5], base_url=base_url)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "weather.db")
+        weather_etl.load_cities_to_db(records, db_path, weather_etl.CITY_TABLE_NAME)
+        weather_etl.load_cities_to_db(records, db_path, weather_etl.CITY_TABLE_NAME)  # same day replaces
+        conn = sqlite3.connect(db_path)
+        count, = conn.execute(f"SELECT COUNT(*) FROM {weather_etl.CITY_TABLE_NAME}").fetchone()
+        conn.close()
+        weather_etl.sqlite_pool.close_all()
+    assert count == 5
+
+
+def test_hourly_slots_flattened_and_loaded_per_city():
+    with stand_in_wttr() as (_, base_url):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "weather.db")
+            sink = weather_etl.WeatherSink(None, None, db_path, weather_etl.CITY_TABLE_NAME, by_city=True,
+                                           batch_size=2, hourly_table_name=weather_etl.HOURLY_TABLE_NAME)
+            with sink:
+                weather_etl.extract_transform_cities(CITIES[:5], base_url=base_url, sink=sink)
+            conn = sqlite3.connect(db_path)
+            rows = conn.execute(f"SELECT city, date, time, temp_c FROM {weather_etl.HOURLY_TABLE_NAME} "
+                                "ORDER BY city, date, time").fetchall()
+            conn.close()
+            weather_etl.sqlite_pool.close_all()
+
+    slots = [(day["date"], int(hourly["time"]), int(hourly["tempC"]))
+             for day in SAMPLE["weather"] for hourly in day["hourly"]]
+    assert len(rows) == 5 * len(slots)
+    assert [row[1:] for row in rows if row[0] == "city 0"] == sorted(slots)
+
+    table = weather_etl.flatten_hourly(SAMPLE, "casablanca")
+    assert table["time"].dtype.kind == "i" and table["temp_c"].dtype.kind == "i"
+    assert list(zip(table["date"], table["time"].tolist(), table["temp_c"].tolist())) == slots
+
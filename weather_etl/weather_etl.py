@@ -6,21 +6,39 @@ Transforms data to required format and loads to log file
 """
 
 import requests
+import argparse
 import json
-import pandas as pd
 import sqlite3
 from datetime import datetime, date, timedelta
+from operator import itemgetter
+import numpy as np
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import sqlite_pool
 
 # Configuration
 CITY = "casablanca"
-API_URL = f"https://wttr.in/{CITY}?format=j1"
+BASE_URL = os.environ.get("WEATHER_BASE_URL", "https://wttr.in")
+API_URL = f"{BASE_URL}/{CITY}?format=j1"
 LOG_FILE = "weather_data.log"
 CSV_FILE = "weather_data.csv"
 DB_FILE = "weather_data.db"
 TABLE_NAME = "weather_reports"
+CITY_TABLE_NAME = "weather_reports_by_city"
+HOURLY_TABLE_NAME = "weather_hourly"
+MAX_CONCURRENT_REQUESTS = 16
+FILE_COLUMNS = ['year', 'month', 'day', 'obs_tmp', 'fc_temp']
+DB_COLUMNS = FILE_COLUMNS + ['timestamp']
+# wttr.in hourly fields -> weather_hourly columns; all integers except precip_mm
+HOURLY_FIELDS = {'time': 'time', 'tempC': 'temp_c', 'FeelsLikeC': 'feels_like_c', 'humidity': 'humidity',
+                 'chanceofrain': 'chance_of_rain', 'windspeedKmph': 'wind_kmph', 'precipMM': 'precip_mm'}
+HOURLY_COLUMNS = ['city', 'date'] + list(HOURLY_FIELDS.values())
+HEADERS = {'User-Agent': 'Weather ETL Pipeline/1.0'}
 
 def setup_logging():
     """Set up logging configuration"""
@@ -52,10 +70,7 @@ def extract_weather_data(url):
     log_progress(f"Extracting weather data from {url}")
     
     try:
-        headers = {
-            'User-Agent': 'Weather ETL Pipeline/1.0'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
         
         weather_data = response.json()
@@ -129,31 +144,227 @@ def transform_weather_data(raw_data):
         log_progress(f"Error transforming weather data: {e}")
         raise
 
-def load_to_csv(data, csv_path):
+def flatten_hourly(raw_data, city=CITY):
     """
-    Load weather data to CSV file
+    Flatten every hourly slot of every forecast day into a long table
+    
+    The fields of each slot are picked with one operator.itemgetter call,
+    and the resulting string matrix is converted column by column with
+    numpy, so there is no per-field dict traversal in the loop.
     
     Args:
-        data (dict): Transformed weather data
-        csv_path (str): Path to CSV file
+        raw_data (dict): Raw weather data from API
+        city (str): City the data belongs to
+        
+    Returns:
+        dict: Column name -> numpy array, one row per (date, time) slot;
+              time is an int32 HHMM value, temperatures are int32
     """
-    log_progress(f"Loading data to CSV: {csv_path}")
+    days = raw_data['weather']
+    getter = itemgetter(*HOURLY_FIELDS)
+    slots = [getter(hourly) for day in days for hourly in day['hourly']]
+    counts = [len(day['hourly']) for day in days]
+    values = np.array(slots, dtype=str).reshape(len(slots), len(HOURLY_FIELDS))
     
-    # Create DataFrame
-    df = pd.DataFrame([data])
+    table = {
+        'city': np.full(len(slots), city, dtype=object),
+        'date': np.repeat(np.array([day['date'] for day in days], dtype=object), counts),
+    }
+    for i, column in enumerate(HOURLY_FIELDS.values()):
+        table[column] = values[:, i].astype(np.float64 if column == 'precip_mm' else np.int32)
+    return table
+
+def concat_hourly(tables):
+    """Concatenate hourly tables of several cities column by column"""
+    if not tables:
+        return {column: np.array([]) for column in HOURLY_COLUMNS}
+    return {column: np.concatenate([table[column] for table in tables]) for column in HOURLY_COLUMNS}
+
+def load_hourly_to_db(table, db_path, table_name=HOURLY_TABLE_NAME, conn=None):
+    """
+    Bulk-load an hourly table in one executemany transaction; slots already
+    loaded for the same city, date and time are replaced
     
-    # Check if file exists to determine if we need headers
-    file_exists = os.path.exists(csv_path)
+    Args:
+        table (dict): Column name -> numpy array, as from flatten_hourly
+        db_path (str): Path to SQLite database
+        table_name (str): Name of database table
+        conn (sqlite3.Connection): Connection to use instead of the pooled one
+    """
+    conn = conn or sqlite_pool.get_connection(db_path)
+    integer_columns = [column for column in HOURLY_COLUMNS[2:] if column != 'precip_mm']
+    columns_sql = ",\n        ".join([f"{column} INTEGER NOT NULL" for column in integer_columns] +
+                                     ["precip_mm REAL NOT NULL"])
+    with conn:
+        conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            city TEXT NOT NULL,
+            date TEXT NOT NULL,
+            {columns_sql},
+            UNIQUE(city, date, time)
+        )
+        """)
+        conn.executemany(f"""
+        INSERT OR REPLACE INTO {table_name}
+        ({', '.join(HOURLY_COLUMNS)})
+        VALUES ({', '.join('?' * len(HOURLY_COLUMNS))})
+        """, zip(*(table[column].tolist() for column in HOURLY_COLUMNS)))
+
+def append_rows(records, path, columns=FILE_COLUMNS, write_header=None):
+    """
+    Append records to a tab-separated file with a single write
     
-    # Append to CSV file
-    df[['year', 'month', 'day', 'obs_tmp', 'fc_temp']].to_csv(
-        csv_path, 
-        mode='a', 
-        header=not file_exists, 
-        index=False,
-        sep='\t'  # Tab-separated for better readability
+    Args:
+        records (list): Transformed weather data
+        path (str): Path to the file
+        columns (list): Record keys to write, in order
+        write_header (bool): Whether to write the header row first;
+            defaults to whether the file does not exist yet
+    """
+    if write_header is None:
+        write_header = not os.path.exists(path)
+    lines = ["\t".join(columns) + "\n"] if write_header else []
+    lines += ["\t".join(str(record[column]) for column in columns) + "\n" for record in records]
+    with open(path, 'a') as f:
+        f.write("".join(lines))
+
+def create_table(conn, table_name, by_city=False):
+    """
+    Create the weather table if it does not exist
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+        table_name (str): Name of database table
+        by_city (bool): Key the rows by city as well as by date
+    """
+    city_column = "city TEXT NOT NULL," if by_city else ""
+    unique = "city, year, month, day" if by_city else "year, month, day"
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {table_name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        {city_column}
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        obs_tmp INTEGER NOT NULL,
+        fc_temp INTEGER NOT NULL,
+        timestamp TEXT NOT NULL,
+        UNIQUE({unique})
     )
+    """)
+
+def insert_records(conn, records, table_name, by_city=False):
+    """
+    Insert (or replace, when the date already exists) many records in one
+    executemany transaction
+    
+    Args:
+        conn (sqlite3.Connection): Database connection
+        records (list): Transformed weather data
+        table_name (str): Name of database table
+        by_city (bool): Records carry a 'city' key that is part of the row key
+    """
+    columns = (['city'] if by_city else []) + DB_COLUMNS
+    with conn:
+        conn.executemany(f"""
+        INSERT OR REPLACE INTO {table_name}
+        ({', '.join(columns)})
+        VALUES ({', '.join('?' * len(columns))})
+        """, [tuple(record[column] for column in columns) for record in records])
+
+class WeatherSink:
+    """
+    Buffers transformed records and flushes them to the log file, CSV file
+    and database in bulk: one append per file and one executemany
+    transaction per batch. File existence and CREATE TABLE are checked once,
+    on the first flush. Targets set to None are skipped. Hourly tables added
+    with add_hourly are flushed with the same batch into hourly_table_name.
+    
+    Use as a context manager so the last partial batch is flushed:
+    
+        with WeatherSink(LOG_FILE, CSV_FILE, DB_FILE, TABLE_NAME) as sink:
+            sink.add(weather_data)
+    """
+    
+    def __init__(self, log_path=LOG_FILE, csv_path=CSV_FILE, db_path=DB_FILE, table_name=TABLE_NAME,
+                 by_city=False, batch_size=500, hourly_table_name=None):
+        self.log_path = log_path
+        self.csv_path = csv_path
+        self.db_path = db_path
+        self.table_name = table_name
+        self.by_city = by_city
+        self.batch_size = batch_size
+        self.hourly_table_name = hourly_table_name
+        self.buffer = []
+        self.hourly = []
+        self.written = 0
+        self.write_header = None  # file path -> whether its header is still missing
+    
+    def add(self, record):
+        """Buffer one record, flushing when the batch is full"""
+        self.buffer.append(record)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+    
+    def add_hourly(self, table):
+        """Buffer the hourly table of one response, written on the next flush"""
+        if self.hourly_table_name:
+            self.hourly.append(table)
+    
+    def extend(self, records):
+        """Buffer many records, flushing every full batch"""
+        for record in records:
+            self.add(record)
     
+    def flush(self):
+        """Write the buffered records to every target"""
+        if not self.buffer:
+            return
+        records, self.buffer = self.buffer, []
+        first = self.write_header is None
+        if first:
+            self.write_header = {path: not os.path.exists(path)
+                                 for path in (self.log_path, self.csv_path) if path}
+        
+        for path in (self.log_path, self.csv_path):
+            if path:
+                append_rows(records, path, write_header=self.write_header[path])
+                self.write_header[path] = False
+        
+        if self.db_path:
+            try:
+                conn = sqlite_pool.get_connection(self.db_path)
+                if first:
+                    create_table(conn, self.table_name, self.by_city)
+                insert_records(conn, records, self.table_name, self.by_city)
+                if self.hourly:
+                    hourly, self.hourly = concat_hourly(self.hourly), []
+                    load_hourly_to_db(hourly, self.db_path, self.hourly_table_name, conn)
+            except sqlite3.Error as e:
+                log_progress(f"Database error: {e}")
+                raise
+        
+        self.written += len(records)
+        log_progress(f"Flushed {len(records)} records ({self.written} total)")
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+def load_to_csv(data, csv_path):
+    """
+    Load weather data to CSV file
+    
+    Args:
+        data (dict): Transformed weather data
+        csv_path (str): Path to CSV file
+    """
+    log_progress(f"Loading data to CSV: {csv_path}")
+    # Tab-separated for better readability
+    append_rows([data], csv_path)
     log_progress("Data loaded to CSV successfully")
 
 def load_to_log(data, log_path):
@@ -165,18 +376,7 @@ def load_to_log(data, log_path):
         log_path (str): Path to log file
     """
     log_progress(f"Loading data to log file: {log_path}")
-    
-    # Check if file exists to determine if we need headers
-    file_exists = os.path.exists(log_path)
-    
-    with open(log_path, 'a') as f:
-        if not file_exists:
-            # Write header
-            f.write("year\tmonth\tday\tobs_tmp\tfc_temp\n")
-        
-        # Write data row
-        f.write(f"{data['year']}\t{data['month']}\t{data['day']}\t{data['obs_tmp']}\t{data['fc_temp']}\n")
-    
+    append_rows([data], log_path)
     log_progress("Data loaded to log file successfully")
 
 def load_to_db(data, db_path, table_name):
@@ -191,44 +391,117 @@ def load_to_db(data, db_path, table_name):
     log_progress(f"Loading data to database: {db_path}")
     
     try:
-        conn = sqlite3.connect(db_path)
-        
-        # Create table if it doesn't exist
-        create_table_query = f"""
-        CREATE TABLE IF NOT EXISTS {table_name} (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            year INTEGER NOT NULL,
-            month INTEGER NOT NULL,
-            day INTEGER NOT NULL,
-            obs_tmp INTEGER NOT NULL,
-            fc_temp INTEGER NOT NULL,
-            timestamp TEXT NOT NULL,
-            UNIQUE(year, month, day)
-        )
-        """
-        conn.execute(create_table_query)
-        
-        # Insert data (or replace if date already exists)
-        insert_query = f"""
-        INSERT OR REPLACE INTO {table_name} 
-        (year, month, day, obs_tmp, fc_temp, timestamp)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """
-        
-        conn.execute(insert_query, (
-            data['year'], data['month'], data['day'],
-            data['obs_tmp'], data['fc_temp'], data['timestamp']
-        ))
-        
-        conn.commit()
-        conn.close()
-        
+        conn = sqlite_pool.get_connection(db_path)
+        create_table(conn, table_name)
+        insert_records(conn, [data], table_name)
         log_progress("Data loaded to database successfully")
         
     except sqlite3.Error as e:
         log_progress(f"Database error: {e}")
         raise
 
+def city_url(city, base_url=None):
+    """
+    Build the wttr.in j1 endpoint URL for a city
+    
+    Args:
+        city (str): City name, e.g. "new york"
+        base_url (str): Service root; defaults to BASE_URL
+        
+    Returns:
+        str: API endpoint URL
+    """
+    return f"{(base_url or BASE_URL).rstrip('/')}/{quote(city)}?format=j1"
+
+def fetch_cities(cities, max_concurrent=MAX_CONCURRENT_REQUESTS, base_url=None, timeout=10):
+    """
+    Fetch the raw weather data of many cities concurrently over one
+    keep-alive session, with at most max_concurrent requests in flight
+    
+    Args:
+        cities (list): City names
+        max_concurrent (int): Maximum number of requests in flight
+        base_url (str): Service root; defaults to BASE_URL
+        timeout (float): Request timeout in seconds
+        
+    Yields:
+        tuple: (city, raw data, error) as each request completes; raw data
+               is None and error the exception when the request failed
+    """
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrent)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    
+    def fetch(city):
+        response = session.get(city_url(city, base_url), timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    
+    try:
+        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
+            futures = {executor.submit(fetch, city): city for city in cities}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    yield futures[future], None, e
+    finally:
+        session.close()
+
+def extract_transform_cities(cities, max_concurrent=MAX_CONCURRENT_REQUESTS, base_url=None, timeout=10,
+                             sink=None):
+    """
+    Fetch many cities concurrently and transform each response as it arrives
+    
+    Args:
+        cities (list): City names
+        max_concurrent (int): Maximum number of requests in flight
+        base_url (str): Service root; defaults to BASE_URL
+        timeout (float): Request timeout in seconds
+        sink (WeatherSink): Optional sink that receives each record as soon
+            as it is transformed, so loading overlaps the remaining fetches
+        
+    Returns:
+        tuple: (list of transformed records with a 'city' key,
+                dict of city -> error for the cities that failed)
+    """
+    log_progress(f"Extracting weather data for {len(cities)} cities, {max_concurrent} at a time")
+    records, failed = [], {}
+    for city, raw_data, error in fetch_cities(cities, max_concurrent, base_url, timeout):
+        if error is None:
+            try:
+                # Build both before keeping either, so a bad payload is only reported as failed
+                record = {'city': city, **transform_weather_data(raw_data)}
+                hourly = flatten_hourly(raw_data, city) if sink is not None else None
+            except (KeyError, IndexError, ValueError) as e:
+                error = e
+            else:
+                records.append(record)
+                if sink is not None:
+                    sink.add_hourly(hourly)
+                    sink.add(record)
+                continue
+        log_progress(f"Skipping {city}: {error}")
+        failed[city] = error
+    log_progress(f"Weather data extracted for {len(records)} cities, {len(failed)} failed")
+    return records, failed
+
+def load_cities_to_db(records, db_path, table_name):
+    """
+    Load the records of many cities to SQLite in one transaction
+    
+    Args:
+        records (list): Transformed weather data with a 'city' key
+        db_path (str): Path to SQLite database
+        table_name (str): Name of database table
+    """
+    log_progress(f"Loading {len(records)} city records to database: {db_path}")
+    with WeatherSink(None, None, db_path, table_name, by_city=True, batch_size=max(1, len(records))) as sink:
+        sink.extend(records)
+    log_progress("City data loaded to database successfully")
+
 def run_query(query, db_path):
     """
     Run a SQL query and return results
@@ -240,13 +513,21 @@ def run_query(query, db_path):
     Returns:
         list: Query results
     """
+    return list(iter_query(query, db_path))
+
+def iter_query(query, db_path):
+    """
+    Run a SQL query on the pooled connection and stream its results
+    
+    Args:
+        query (str): SQL query to execute
+        db_path (str): Path to SQLite database
+        
+    Yields:
+        tuple: One result row, fetched in batches
+    """
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute(query)
-        results = cursor.fetchall()
-        conn.close()
-        return results
+        yield from sqlite_pool.iter_rows(db_path, query)
     except sqlite3.Error as e:
         log_progress(f"Query error: {e}")
         raise
@@ -269,7 +550,7 @@ def display_recent_data(db_path, table_name, limit=10):
     LIMIT {limit}
     """
     
-    results = run_query(query, db_path)
+    results = iter_query(query, db_path)
     
     print(f"\n{'='*70}")
     print(f"RECENT WEATHER DATA FOR CASABLANCA (Last {limit} records)")
@@ -284,7 +565,7 @@ def display_recent_data(db_path, table_name, limit=10):
     
     print(f"{'='*70}\n")
 
-def main():
+def main(url=None):
     """Main ETL pipeline execution"""
     
     # Setup logging
@@ -299,15 +580,15 @@ def main():
     
     try:
         # Extract
-        raw_data = extract_weather_data(API_URL)
+        raw_data = extract_weather_data(url or API_URL)
         
         # Transform
         weather_data = transform_weather_data(raw_data)
         
         # Load
-        load_to_log(weather_data, LOG_FILE)
-        load_to_csv(weather_data, CSV_FILE)
-        load_to_db(weather_data, DB_FILE, TABLE_NAME)
+        with WeatherSink(LOG_FILE, CSV_FILE, DB_FILE, TABLE_NAME, hourly_table_name=HOURLY_TABLE_NAME) as sink:
+            sink.add_hourly(flatten_hourly(raw_data, CITY))
+            sink.add(weather_data)
         
         # Display results
         print("\n🌤️  WEATHER ETL RESULTS")
@@ -327,5 +608,44 @@ def main():
         log_progress(f"PIPELINE FAILED: {e}")
         raise
 
+def main_cities(cities, max_concurrent=MAX_CONCURRENT_REQUESTS, base_url=None, batch_size=500):
+    """Multi-city ETL: concurrent extraction, batched database writes"""
+    setup_logging()
+    log_progress("=" * 60)
+    log_progress(f"WEATHER ETL PIPELINE STARTED FOR {len(cities)} CITIES")
+    log_progress("=" * 60)
+    
+    with WeatherSink(None, None, DB_FILE, CITY_TABLE_NAME, by_city=True, batch_size=batch_size,
+                     hourly_table_name=HOURLY_TABLE_NAME) as sink:
+        records, failed = extract_transform_cities(cities, max_concurrent, base_url, sink=sink)
+    
+    for record in sorted(records, key=lambda r: r['city']):
+        print(f"{record['city']:<24} {record['obs_tmp']:>4}°C now {record['fc_temp']:>4}°C tomorrow noon")
+    
+    log_progress("=" * 60)
+    log_progress(f"WEATHER ETL PIPELINE COMPLETED: {len(records)} loaded, {len(failed)} failed")
+    log_progress("=" * 60)
+    return records, failed
+
+def read_city_file(path):
+    """Read one city name per line, skipping blank lines and # comments"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Weather ETL for wttr.in")
+    parser.add_argument("--cities", help="comma-separated city names (multi-city mode)")
+    parser.add_argument("--city-file", help="file with one city name per line (multi-city mode)")
+    parser.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT_REQUESTS,
+                        help="requests in flight at once in multi-city mode")
+    parser.add_argument("--base-url", help=f"weather service root (default {BASE_URL})")
+    parser.add_argument("--batch-size", type=int, default=500, help="records per database write in multi-city mode")
+    args = parser.parse_args()
+    
+    cities = read_city_file(args.city_file) if args.city_file else []
+    if args.cities:
+        cities += [city.strip() for city in args.cities.split(",") if city.strip()]
+    if cities:
+        main_cities(cities, args.max_concurrent, args.base_url, args.batch_size)
+    else:
+        main(city_url(CITY, args.base_url) if args.base_url else None) 
\ No newline at end of file
@@ -1,8 +1,13 @@
+import os
+import sys
 import requests
 import sqlite3
 import pandas as pd
 from bs4 import BeautifulSoup
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.numeric import parse_numeric
+
 url = 'https://web.archive.org/web/20230902185655/https://en.everybodywiki.com/100_Most_Highly-Ranked_Films'
 db_name = 'Movies.db'
 table_name = 'Top_50'
@@ -39,6 +44,10 @@ for row in rows:
                 print(f"Error processing row: {e}")
                 continue
 
+# Convert rank and year to integers; unparseable cells become missing values
+for column in ["Average Rank", "Year"]:
+    df[column] = pd.Series(parse_numeric(df[column])[0]).astype("Int64")
+
 # Save to CSV
 df.to_csv(csv_path, index=False)
 print(f"\n✅ Successfully saved {len(df)} movies to {csv_path}")